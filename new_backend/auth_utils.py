@@ -1,11 +1,28 @@
 # new_backend/auth_utils.py
 # Will contain password hashing, token generation, and token validation functions.
+import logging
+
 from passlib.context import CryptContext
 
+log = logging.getLogger(__name__)
+
 # Setup passlib context
 # Schemes can be adjusted, bcrypt is a good default.
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Surface which backend passlib picked: 'bcrypt' is the C extension (the fast
+# native path); 'builtin' means pure Python and roughly an order of magnitude
+# slower per hash, which is worth noticing in the logs at deploy time.
+try:
+    log.info("passlib bcrypt backend: %s", pwd_context.handler("bcrypt").get_backend())
+except Exception: # backend probing must never break startup
+    pass
+
+# Precomputed hash of a throwaway value, verified against when a login email
+# does not exist: both login outcomes then pay one full bcrypt, so response
+# timing no longer reveals whether an email is registered.
+DUMMY_HASH = pwd_context.hash("timing-equalizer")
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
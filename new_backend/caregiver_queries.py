@@ -17,16 +17,78 @@ def add_caregiver_photo(db_conn, caregiver_profile_id, image_url, caption=None):
     finally:
         cursor.close()
 
-def get_caregiver_photos(db_conn, caregiver_profile_id):
+def get_caregiver_photos(db_conn, caregiver_profile_id, after=None, limit=50):
     cursor = db_conn.cursor(dictionary=True)
     try:
         # schema.sql: photos.caregiver_profile_id
-        query = "SELECT id, caregiver_profile_id, image_url, caption, uploaded_at FROM photos WHERE caregiver_profile_id = %s ORDER BY uploaded_at DESC"
-        cursor.execute(query, (caregiver_profile_id,))
+        # Keyset pagination over (uploaded_at, id): 'after' is the ordering tuple
+        # of the last row of the previous page. The caller asks for limit+1 rows
+        # to know whether a further page exists.
+        query = "SELECT id, caregiver_profile_id, image_url, caption, uploaded_at FROM photos WHERE caregiver_profile_id = %s"
+        params = [caregiver_profile_id]
+        if after is not None:
+            query += " AND (uploaded_at, id) < (%s, %s)"
+            params.extend(after)
+        query += " ORDER BY uploaded_at DESC, id DESC LIMIT %s"
+        params.append(limit + 1)
+        cursor.execute(query, tuple(params))
         return cursor.fetchall()
     finally:
         cursor.close()
 
+def get_caregiver_photos_json(db_conn, caregiver_profile_id, after=None, limit=50):
+    """
+    Returns one keyset page of photos as a DB-built JSON array string, plus the
+    (uploaded_at, id) tuple of the page's last row (None when this is the last page).
+    JSON_ARRAYAGG/JSON_OBJECT build the payload server-side, so the app never
+    allocates a dict or Pydantic model per row - it just forwards the bytes.
+    """
+    cursor = db_conn.cursor(dictionary=True)
+    try:
+        # Step 1: cheap keyset query over just (id, uploaded_at) to find the page
+        # boundaries (limit+1 rows to detect whether a further page exists).
+        key_query = "SELECT id, uploaded_at FROM photos WHERE caregiver_profile_id = %s"
+        params = [caregiver_profile_id]
+        if after is not None:
+            key_query += " AND (uploaded_at, id) < (%s, %s)"
+            params.extend(after)
+        key_query += " ORDER BY uploaded_at DESC, id DESC LIMIT %s"
+        params.append(limit + 1)
+        cursor.execute(key_query, tuple(params))
+        key_rows = cursor.fetchall()
+
+        has_more = len(key_rows) > limit
+        key_rows = key_rows[:limit]
+        if not key_rows:
+            return "[]", None
+        next_after = (key_rows[-1]['uploaded_at'], key_rows[-1]['id']) if has_more else None
+
+        # Step 2: aggregate exactly the page's rows into a JSON array server-side.
+        # The derived table keeps the DESC ordering before aggregation.
+        # DATE_FORMAT emits ISO-8601 so the payload matches what Pydantic produced
+        # (%% because mysql.connector treats bare % as a placeholder marker).
+        ids_placeholders = ", ".join(["%s"] * len(key_rows))
+        agg_query = f"""
+        SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                   'id', t.id,
+                   'caregiver_profile_id', t.caregiver_profile_id,
+                   'image_url', t.image_url,
+                   'caption', t.caption,
+                   'uploaded_at', DATE_FORMAT(t.uploaded_at, '%%Y-%%m-%%dT%%H:%%i:%%s')
+               )) AS items_json
+        FROM (
+            SELECT id, caregiver_profile_id, image_url, caption, uploaded_at
+            FROM photos
+            WHERE id IN ({ids_placeholders})
+            ORDER BY uploaded_at DESC, id DESC
+        ) t
+        """
+        cursor.execute(agg_query, tuple(row['id'] for row in key_rows))
+        result = cursor.fetchone()
+        return (result['items_json'] or "[]"), next_after
+    finally:
+        cursor.close()
+
 def get_photo_by_id(db_conn, photo_id):
     cursor = db_conn.cursor(dictionary=True)
     try:
@@ -73,20 +135,32 @@ def create_availability_slot(db_conn, caregiver_profile_id, day_of_week, start_t
     finally:
         cursor.close()
 
-def get_availability_slots_for_caregiver(db_conn, caregiver_profile_id):
+def get_availability_slots_for_caregiver(db_conn, caregiver_profile_id, after_id=None, limit=50):
     cursor = db_conn.cursor(dictionary=True)
     try:
         # schema.sql: availability_slots.caregiver_profile_id
-        # Querying only basic fields as per provided snippet.
+        # Keyset pagination on id (auto-increment, so equivalent to creation order).
+        # The caller asks for limit+1 rows to know whether a further page exists.
+        # TIME columns come back pre-formatted as 'HH:MM:SS' strings: the
+        # response fields are str, so no timedelta/time objects are allocated
+        # per row on this hot loop (%% escapes TIME_FORMAT's specifiers from
+        # the paramstyle substitution).
         query = """
-        SELECT id, caregiver_profile_id, day_of_week, start_time, end_time 
-        FROM availability_slots 
-        WHERE caregiver_profile_id = %s 
-        ORDER BY day_of_week, start_time
+        SELECT id, caregiver_profile_id, day_of_week,
+               TIME_FORMAT(start_time, '%%H:%%i:%%s') AS start_time,
+               TIME_FORMAT(end_time, '%%H:%%i:%%s') AS end_time
+        FROM availability_slots
+        WHERE caregiver_profile_id = %s
         """
+        params = [caregiver_profile_id]
+        if after_id is not None:
+            query += " AND id > %s"
+            params.append(after_id)
         # If we only want non-recurring slots created by the basic create_availability_slot:
         # query += " AND is_recurring = FALSE AND specific_date IS NULL"
-        cursor.execute(query, (caregiver_profile_id,))
+        query += " ORDER BY id LIMIT %s"
+        params.append(limit + 1)
+        cursor.execute(query, tuple(params))
         return cursor.fetchall()
     finally:
         cursor.close()
@@ -94,18 +168,31 @@ def get_availability_slots_for_caregiver(db_conn, caregiver_profile_id):
 def get_availability_slot_by_id(db_conn, slot_id):
     cursor = db_conn.cursor(dictionary=True)
     try:
-        query = "SELECT id, caregiver_profile_id, day_of_week, start_time, end_time FROM availability_slots WHERE id = %s"
+        # Same 'HH:MM:SS' string projection as the listing query
+        query = ("SELECT id, caregiver_profile_id, day_of_week, "
+                 "TIME_FORMAT(start_time, '%%H:%%i:%%s') AS start_time, "
+                 "TIME_FORMAT(end_time, '%%H:%%i:%%s') AS end_time "
+                 "FROM availability_slots WHERE id = %s")
         cursor.execute(query, (slot_id,))
         return cursor.fetchone()
     finally:
         cursor.close()
 
-def update_availability_slot(db_conn, slot_id, day_of_week, start_time, end_time): # Ownership checked before
+def update_availability_slot(db_conn, slot_id, caregiver_profile_id, day_of_week=None, start_time=None, end_time=None):
     cursor = db_conn.cursor()
     try:
+        # Authorization + partial update in one statement: ownership lives in the
+        # WHERE clause and COALESCE keeps fields the caller did not set unchanged.
         # This update assumes the slot remains non-recurring with specific_date as NULL.
-        query = "UPDATE availability_slots SET day_of_week = %s, start_time = %s, end_time = %s, updated_at = NOW() WHERE id = %s"
-        cursor.execute(query, (day_of_week, start_time, end_time, slot_id))
+        query = """
+        UPDATE availability_slots
+        SET day_of_week = COALESCE(%s, day_of_week),
+            start_time = COALESCE(%s, start_time),
+            end_time = COALESCE(%s, end_time),
+            updated_at = NOW()
+        WHERE id = %s AND caregiver_profile_id = %s
+        """
+        cursor.execute(query, (day_of_week, start_time, end_time, slot_id, caregiver_profile_id))
         db_conn.commit()
         return cursor.rowcount > 0
     except Exception as e:
@@ -114,11 +201,12 @@ def update_availability_slot(db_conn, slot_id, day_of_week, start_time, end_time
     finally:
         cursor.close()
 
-def delete_availability_slot(db_conn, slot_id): # Ownership checked before
+def delete_availability_slot(db_conn, slot_id, caregiver_profile_id):
     cursor = db_conn.cursor()
     try:
-        query = "DELETE FROM availability_slots WHERE id = %s"
-        cursor.execute(query, (slot_id,))
+        # Ownership enforced in the WHERE clause, same as update_availability_slot
+        query = "DELETE FROM availability_slots WHERE id = %s AND caregiver_profile_id = %s"
+        cursor.execute(query, (slot_id, caregiver_profile_id))
         db_conn.commit()
         return cursor.rowcount > 0
     except Exception as e:
@@ -0,0 +1,38 @@
+# new_backend/list_cache.py
+# Short-TTL cache of fully serialized list-endpoint pages. Browsers hammer
+# /api/caregivers/ and /api/families/ with the same filter/page combinations;
+# caching the ready-to-send JSON body (plus its ETag) means repeat hits do no
+# DB work and no serialization at all. Same stdlib dict + lock approach as
+# profile_lookup, to avoid pulling in a cache/Redis dependency for a
+# single-process deployment.
+import hashlib
+import threading
+import time
+
+CACHE_TTL_SECONDS = 30
+CACHE_MAX_ENTRIES = 1000
+
+_cache = {} # key -> (expires_at, body_bytes, etag)
+_cache_lock = threading.Lock()
+
+def make_key(endpoint: str, filter_data: dict, page: int, page_size: int):
+    # filter_data comes from model_dump(exclude_none=True); items are hashable scalars
+    return (endpoint, frozenset(filter_data.items()), page, page_size)
+
+def get(key):
+    """Return (body_bytes, etag) for a fresh entry, or None."""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1], entry[2]
+    return None
+
+def put(key, body: bytes) -> str:
+    """Store a serialized page body, returning its strong ETag."""
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    with _cache_lock:
+        if len(_cache) >= CACHE_MAX_ENTRIES:
+            _cache.clear() # crude eviction, but bounded; hot pages repopulate within one TTL
+        _cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, body, etag)
+    return etag
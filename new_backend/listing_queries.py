@@ -1,26 +1,117 @@
 # new_backend/listing_queries.py
 
-def list_caregiver_profiles(db_conn, filters: dict, page: int = 1, page_size: int = 10):
+# Filter key -> (SQL predicate, parameter builder), in a fixed order so the
+# cached clause string and the per-request parameter list always line up.
+# Declaring the mapping once lets the WHERE template for a given set of filter
+# keys be assembled a single time and reused (the key-sets browsers actually
+# send are few), instead of re-concatenating the clause strings per request.
+_CAREGIVER_FILTER_CLAUSES = {
+    'city': ("u.city LIKE %s", lambda v: f"%{v}%"),
+    'state': ("u.state LIKE %s", lambda v: f"%{v}%"), # 'state' filter key, mapped from 'region' in Pydantic
+    'country': ("u.country LIKE %s", lambda v: f"%{v}%"),
+    # Rate filters arrive as int cents; compare against the DECIMAL column in
+    # cents so no Decimal/float conversion happens in Python.
+    'min_hourly_rate': ("cp.hourly_rate * 100 >= %s", lambda v: v),
+    'max_hourly_rate': ("cp.hourly_rate * 100 <= %s", lambda v: v),
+    'min_experience_years': ("cp.years_of_experience >= %s", lambda v: v), # schema.sql: years_of_experience
+    'specializations': ("cp.skills_description LIKE %s", lambda v: f"%{v}%"), # schema.sql: skills_description
+    'languages_spoken': ("cp.languages_spoken LIKE %s", lambda v: f"%{v}%"),
+    'availability_status': ("cp.availability_status = %s", lambda v: v),
+}
+
+_FAMILY_FILTER_CLAUSES = {
+    'city': ("u.city LIKE %s", lambda v: f"%{v}%"),
+    'state': ("u.state LIKE %s", lambda v: f"%{v}%"), # 'state' filter key, mapped from 'region' in Pydantic
+    'country': ("u.country LIKE %s", lambda v: f"%{v}%"),
+    'care_needs': ("fp.preferred_care_type LIKE %s", lambda v: f"%{v}%"), # schema.sql: preferred_care_type
+    'location_preferences': ("fp.location_preferences LIKE %s", lambda v: f"%{v}%"),
+    'number_of_children': ("fp.number_of_children = %s", lambda v: v),
+}
+
+# frozenset(active filter keys) -> (page_query, count_query)
+_caregiver_template_cache = {}
+_family_template_cache = {}
+
+
+def _active_filters(filters: dict, clause_specs: dict):
+    # Same semantics as the old per-key checks: string filters were skipped
+    # when empty, numeric ones only when None (0 is a valid value).
+    return {
+        key: value for key, value in filters.items()
+        if key in clause_specs and value is not None and value != ''
+    }
+
+
+def _templates_for(active_keys, base_query, count_query, clause_specs, template_cache):
+    cache_key = frozenset(active_keys)
+    cached = template_cache.get(cache_key)
+    if cached is None:
+        clauses = [clause for key, (clause, _) in clause_specs.items() if key in cache_key]
+        clause_str = (" AND " + " AND ".join(clauses)) if clauses else ""
+        page_query = base_query + clause_str + " ORDER BY u.created_at DESC LIMIT %s OFFSET %s"
+        cached = (page_query, count_query + clause_str)
+        template_cache[cache_key] = cached
+    return cached
+
+
+def _run_list_query(db_conn, filters, page, page_size,
+                    base_query, count_query, clause_specs, template_cache):
     cursor = db_conn.cursor(dictionary=True)
-    
+    try:
+        active = _active_filters(filters, clause_specs)
+        page_query, count_query = _templates_for(
+            active, base_query, count_query, clause_specs, template_cache
+        )
+        # Parameter order follows the clause_specs declaration order, matching
+        # the cached clause string built in _templates_for.
+        filter_params = [
+            make_param(active[key])
+            for key, (_, make_param) in clause_specs.items() if key in active
+        ]
+
+        offset = (page - 1) * page_size
+        cursor.execute(page_query, tuple(filter_params) + (page_size, offset))
+        results = cursor.fetchall()
+
+        if results:
+            total_count = results[0]['total_count']
+            for row in results:
+                row.pop('total_count', None) # bookkeeping column only
+        else:
+            # Page beyond the end: fall back to the plain COUNT for an accurate total
+            cursor.execute(count_query, tuple(filter_params))
+            total_count_result = cursor.fetchone()
+            total_count = total_count_result['total_count'] if total_count_result else 0
+
+        return results, total_count
+    finally:
+        cursor.close()
+
+
+def list_caregiver_profiles(db_conn, filters: dict, page: int = 1, page_size: int = 10):
     # Adapted to schema.sql:
     # u.user_type AS role, u.bio AS user_bio
     # cp.availability_status AS availability_details, cp.certifications AS certifications
+    # Projection is exactly the PublicCaregiverProfileResponse field set: the
+    # rows go to orjson without a validation pass, so anything selected here
+    # ships to the client - no u.email, no cp.background_check_status.
     base_query = """
-    SELECT u.id, u.username, u.email, u.user_type AS role, u.first_name, u.last_name, 
-           u.city, u.state AS region, u.country, u.profile_picture AS profile_picture_url, 
+    SELECT u.id, u.username, u.user_type AS role, u.first_name, u.last_name,
+           u.city, u.state AS region, u.country, u.profile_picture AS profile_picture_url,
            u.created_at AS user_created_at, u.bio AS user_bio,
-           cp.id AS caregiver_profile_id, cp.hourly_rate, 
-           cp.availability_status AS availability_details, 
-           cp.years_of_experience AS experience_years, 
-           cp.skills_description AS specializations, 
+           cp.id AS caregiver_profile_id,
+           CAST(ROUND(cp.hourly_rate * 100) AS SIGNED) AS hourly_rate_cents, -- int cents: no per-row Decimal allocation client-side
+           cp.availability_status AS availability_details,
+           cp.years_of_experience AS experience_years,
+           cp.skills_description AS specializations,
            cp.certifications AS certifications,
-           cp.languages_spoken, cp.id_verified, cp.background_check_status -- Added more fields from caregiver_profiles
+           cp.languages_spoken, cp.id_verified,
+           COUNT(*) OVER () AS total_count -- fold the total into the page query (single execution of the join)
     FROM users u
     JOIN caregiver_profiles cp ON u.id = cp.user_id
     WHERE u.user_type = 'caregiver' AND u.is_active = TRUE
     """
-    
+
     count_query = """
     SELECT COUNT(*) as total_count
     FROM users u
@@ -28,72 +119,27 @@ def list_caregiver_profiles(db_conn, filters: dict, page: int = 1, page_size: in
     WHERE u.user_type = 'caregiver' AND u.is_active = TRUE
     """
 
-    where_clauses = []
-    params = []
-
-    if filters.get('city'):
-        where_clauses.append("u.city LIKE %s")
-        params.append(f"%{filters['city']}%")
-    if filters.get('state'): # 'state' filter key, mapped from 'region' in Pydantic
-        where_clauses.append("u.state LIKE %s")
-        params.append(f"%{filters['state']}%")
-    if filters.get('country'):
-        where_clauses.append("u.country LIKE %s")
-        params.append(f"%{filters['country']}%")
-    if filters.get('min_hourly_rate') is not None:
-        where_clauses.append("cp.hourly_rate >= %s")
-        params.append(filters['min_hourly_rate'])
-    if filters.get('max_hourly_rate') is not None:
-        where_clauses.append("cp.hourly_rate <= %s")
-        params.append(filters['max_hourly_rate'])
-    if filters.get('min_experience_years') is not None:
-        where_clauses.append("cp.years_of_experience >= %s") # schema.sql: years_of_experience
-        params.append(filters['min_experience_years'])
-    if filters.get('specializations'): # Mapped to skills_description
-         where_clauses.append("cp.skills_description LIKE %s") # schema.sql: skills_description
-         params.append(f"%{filters['specializations']}%")
-    if filters.get('languages_spoken'):
-        where_clauses.append("cp.languages_spoken LIKE %s")
-        params.append(f"%{filters['languages_spoken']}%")
-    if filters.get('availability_status'): # Direct match to availability_status
-        where_clauses.append("cp.availability_status = %s")
-        params.append(filters['availability_status'])
-
-
-    if where_clauses:
-        clause_str = " AND " + " AND ".join(where_clauses)
-        base_query += clause_str
-        count_query += clause_str
-            
-    cursor.execute(count_query, tuple(params))
-    total_count_result = cursor.fetchone()
-    total_count = total_count_result['total_count'] if total_count_result else 0
-
-    base_query += " ORDER BY u.created_at DESC"
-    offset = (page - 1) * page_size
-    base_query += " LIMIT %s OFFSET %s"
-    params.extend([page_size, offset])
-    
-    cursor.execute(base_query, tuple(params))
-    results = cursor.fetchall()
-    cursor.close()
-    
-    return results, total_count
+    return _run_list_query(
+        db_conn, filters, page, page_size,
+        base_query, count_query, _CAREGIVER_FILTER_CLAUSES, _caregiver_template_cache
+    )
 
-def list_family_profiles(db_conn, filters: dict, page: int = 1, page_size: int = 10):
-    cursor = db_conn.cursor(dictionary=True)
 
+def list_family_profiles(db_conn, filters: dict, page: int = 1, page_size: int = 10):
     # Adapted to schema.sql:
     # u.user_type AS role, u.bio AS user_bio
     # fp.preferred_care_type AS care_needs
     # Added: fp.number_of_children, fp.children_ages, fp.specific_needs, fp.location_preferences
+    # Same rule as the caregiver projection above: public fields only, the
+    # rows are serialized as-is.
     base_query = """
-    SELECT u.id, u.username, u.email, u.user_type AS role, u.first_name, u.last_name,
-           u.city, u.state AS region, u.country, u.profile_picture AS profile_picture_url, 
+    SELECT u.id, u.username, u.user_type AS role, u.first_name, u.last_name,
+           u.city, u.state AS region, u.country, u.profile_picture AS profile_picture_url,
            u.created_at AS user_created_at, u.bio AS user_bio,
-           fp.id as family_profile_id, 
-           fp.number_of_children, fp.children_ages, fp.specific_needs, 
-           fp.location_preferences, fp.preferred_care_type AS care_needs
+           fp.id as family_profile_id,
+           fp.number_of_children, fp.children_ages, fp.specific_needs,
+           fp.location_preferences, fp.preferred_care_type AS care_needs,
+           COUNT(*) OVER () AS total_count -- fold the total into the page query (single execution of the join)
     FROM users u
     JOIN family_profiles fp ON u.id = fp.user_id
     WHERE u.user_type = 'family' AND u.is_active = TRUE
@@ -104,46 +150,8 @@ def list_family_profiles(db_conn, filters: dict, page: int = 1, page_size: int =
     JOIN family_profiles fp ON u.id = fp.user_id
     WHERE u.user_type = 'family' AND u.is_active = TRUE
     """
-    
-    where_clauses = []
-    params = []
-
-    if filters.get('city'):
-        where_clauses.append("u.city LIKE %s")
-        params.append(f"%{filters['city']}%")
-    if filters.get('state'): # 'state' filter key, mapped from 'region' in Pydantic
-        where_clauses.append("u.state LIKE %s")
-        params.append(f"%{filters['state']}%")
-    if filters.get('country'):
-        where_clauses.append("u.country LIKE %s")
-        params.append(f"%{filters['country']}%")
-    if filters.get('care_needs'): # Mapped to preferred_care_type
-        where_clauses.append("fp.preferred_care_type LIKE %s") # schema.sql: preferred_care_type
-        params.append(f"%{filters['care_needs']}%")
-    if filters.get('location_preferences'):
-        where_clauses.append("fp.location_preferences LIKE %s")
-        params.append(f"%{filters['location_preferences']}%")
-    if filters.get('number_of_children') is not None:
-        where_clauses.append("fp.number_of_children = %s")
-        params.append(filters['number_of_children'])
-
-
-    if where_clauses:
-        clause_str = " AND " + " AND ".join(where_clauses)
-        base_query += clause_str
-        count_query += clause_str
-
-    cursor.execute(count_query, tuple(params))
-    total_count_result = cursor.fetchone()
-    total_count = total_count_result['total_count'] if total_count_result else 0
-    
-    base_query += " ORDER BY u.created_at DESC"
-    offset = (page - 1) * page_size
-    base_query += " LIMIT %s OFFSET %s"
-    params.extend([page_size, offset])
-    
-    cursor.execute(base_query, tuple(params))
-    results = cursor.fetchall()
-    cursor.close()
-
-    return results, total_count
+
+    return _run_list_query(
+        db_conn, filters, page, page_size,
+        base_query, count_query, _FAMILY_FILTER_CLAUSES, _family_template_cache
+    )
@@ -1,10 +1,10 @@
 # new_backend/main.py
 from fastapi import FastAPI, HTTPException, Depends, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, EmailStr
 import datetime # Not directly used in this snippet, but good for context
 
-from typing import Union # For response model union
+from typing import Literal # For role validation
 
 from fastapi import APIRouter # New import
 from typing import List # New import
@@ -21,12 +21,46 @@ from . import messaging_queries
 from . import review_queries
 from . import transaction_queries # New import
 from . import paypal_utils # New import
+from . import profile_lookup # TTL cache for user -> profile-id mappings
+from . import list_cache # short-TTL cache of serialized list pages + ETags
+from . import query_cache # request-scoped memoization for repeated lookups
 from . import config # New import, for PayPal URLs
 
-from fastapi import Request, Query # New imports
+from fastapi import Request, Response, Query # New imports
 import math # New import
-
-app = FastAPI()
+import base64 # For keyset pagination cursors
+import hashlib # For ETags on public list endpoints
+import logging
+import logging.handlers
+import orjson # direct serialization for cached list pages
+import queue # Log queue between request threads and the listener thread
+
+# Error reporting goes through logging instead of print(): records are pushed
+# onto an in-process queue and a background QueueListener thread does the
+# actual stream I/O, so an error burst never blocks request handling on
+# synchronous stdout writes.
+log = logging.getLogger(__name__)
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+
+def setup_logging():
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(_log_queue))
+    _log_listener.start()
+
+# orjson serializes datetime-heavy payloads in C, much faster than json.dumps
+# on list endpoints. Our own subclass rather than fastapi.responses'
+# ORJSONResponse so that default=str covers Decimal (and any other type orjson
+# doesn't know) even for raw dicts that never pass through jsonable_encoder -
+# the same convention the hand-built orjson.dumps call sites below use.
+class OrjsonResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS, default=str)
+
+app = FastAPI(default_response_class=OrjsonResponse)
 caregiver_router = APIRouter(prefix="/api/caregivers", tags=["Caregiver Specific"])
 list_router = APIRouter(tags=["Listings & Search"]) 
 match_router = APIRouter(prefix="/api/matches", tags=["Matching System"]) 
@@ -35,99 +69,55 @@ review_router = APIRouter(prefix="/api/reviews", tags=["Review System"])
 payment_router = APIRouter(prefix="/api/payments", tags=["Payment System"]) # New Payment Router
 
 
-# Dependency to get current caregiver's profile_id (from caregiver_profiles table)
-async def get_current_caregiver_profile_id(current_user: dict = Depends(get_current_user)):
-    if current_user['role'] != 'caregiver':
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a caregiver")
-    
-    db_conn = None
-    cursor = None # Initialize cursor to None for the finally block
-    try:
-        db_conn = db_utils.get_db_connection()
-        if not db_conn:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
-        
-        cursor = db_conn.cursor(dictionary=True)
-        cursor.execute("SELECT id FROM caregiver_profiles WHERE user_id = %s", (current_user['id'],))
-        cg_profile = cursor.fetchone()
-        if not cg_profile:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Caregiver profile not found for this user.")
-        return cg_profile['id']
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error in get_current_caregiver_profile_id: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching caregiver profile ID.")
-    finally:
-        if cursor:
-            cursor.close()
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+# Hot profile-id lookup statement, hoisted to module level.
+# Using the exact same statement text on every call lets the server reuse its
+# prepared-statement cache instead of re-parsing the query each request.
+SQL_CAREGIVER_PROFILE_ID_BY_USER = "SELECT id FROM caregiver_profiles WHERE user_id = %s"
 
-# Dependency to get current family's profile_id (from family_profiles table)
-async def get_current_family_profile_id(current_user: dict = Depends(get_current_user)):
-    if current_user['role'] != 'family':
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a family member")
-    
-    db_conn = None
-    cursor = None # Initialize cursor to None
-    try:
-        db_conn = db_utils.get_db_connection() # Manual DB connection
-        if not db_conn:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
-            
-        cursor = db_conn.cursor(dictionary=True)
-        cursor.execute("SELECT id FROM family_profiles WHERE user_id = %s", (current_user['id'],))
-        fam_profile = cursor.fetchone()
-        if not fam_profile:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Family profile not found for this user.")
-        return fam_profile['id']
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error in get_current_family_profile_id: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching family profile ID.")
-    finally:
-        if cursor: # Ensure cursor is closed if it was opened
-            cursor.close()
-        if db_conn and db_conn.is_connected(): # Close manual connection
-            db_conn.close()
+# --- Keyset pagination cursor helpers ---
+# Cursors are opaque to clients: base64 of the last row's ordering values joined by '|'.
+def encode_cursor(*parts) -> str:
+    return base64.urlsafe_b64encode("|".join(str(p) for p in parts).encode()).decode()
 
-# Dependency to check if current user is a participant in a conversation
-async def get_conversation_if_participant(
-    conversation_id: int, 
-    current_user: dict = Depends(get_current_user)
-) -> int: # Return conversation_id for convenience if participant
-    db_conn = None
+def decode_cursor(cursor_str: str, expected_parts: int):
     try:
-        db_conn = db_utils.get_db_connection()
-        if not db_conn:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
-        
-        is_participant = messaging_queries.check_user_in_conversation(db_conn, current_user['id'], conversation_id)
-        if not is_participant:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a participant in this conversation.")
-        return conversation_id # Or True, but returning ID might be useful
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error in get_conversation_if_participant: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error verifying conversation participation.")
-    finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
-
-# Initialize DB Pool on startup
+        parts = base64.urlsafe_b64decode(cursor_str.encode()).decode().split("|")
+        if len(parts) != expected_parts:
+            raise ValueError("Unexpected cursor arity")
+        return parts
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+# --- Conditional GET helper ---
+def make_profile_etag(user_id: int, profile_data: dict, variant: str = "") -> str:
+    # Weak ETag from the profile row's UNIX_TIMESTAMP(updated_at) version
+    # column; variant distinguishes alternate representations (e.g. compact)
+    # of the same row so caches never serve one for the other.
+    return f'W/"{user_id}-{profile_data.get("profile_version") or 0}{variant}"'
+
+# Each request starts with a fresh query-memoization dict; the contextvar set
+# here propagates into the threadpool where sync handlers run.
+@app.middleware("http")
+async def reset_query_cache(request: Request, call_next):
+    query_cache.reset()
+    return await call_next(request)
+
+# Initialize logging + DB Pool on startup
 @app.on_event("startup")
 async def startup_event():
+    setup_logging()
     db_utils.init_db_pool()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    _log_listener.stop() # flush any queued records before the process exits
+
 # Pydantic models for request bodies
 class UserCreate(BaseModel):
     username: str
     email: EmailStr
     password: str
-    role: str # Consider Enum: Literal['caregiver', 'family', 'admin'] as per schema
+    role: Literal['caregiver', 'family', 'admin'] # Matches users.user_type ENUM; invalid roles are rejected before the handler runs
     first_name: str | None = None
     last_name: str | None = None
 
@@ -142,11 +132,27 @@ class TokenData(BaseModel):
     email: EmailStr
     role: str
 
-# Security scheme for token authentication
-bearer_scheme = HTTPBearer()
+# Token extraction for Authorization: Bearer <token>.
+# A plain header lookup + prefix check replaces fastapi.security.HTTPBearer,
+# which allocated an HTTPAuthorizationCredentials model per request.
+# Depends() caches the result, so auth endpoints share one extraction per request.
+def get_bearer_token(request: Request) -> str:
+    auth_header = request.headers.get("authorization", "")
+    if not auth_header.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return auth_header[7:] # strip "Bearer "
+
+# NOTE on sync vs async: mysql-connector calls are blocking, so every handler
+# and dependency that touches the DB is a plain `def`. FastAPI runs those in
+# its threadpool, keeping the event loop free; `async def` handlers doing
+# blocking queries would stall the whole server under concurrency.
 
 # Dependency to get current user from token
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+def get_current_user(token: str = Depends(get_bearer_token)):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -154,8 +160,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
             # This means init_db_pool might have failed or not been called.
             # Or get_connection itself failed.
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
-        
-        token = credentials.credentials
+
         user_id = auth_utils.get_user_by_token(db_conn, token)
         if user_id is None:
             raise HTTPException(
@@ -175,11 +180,54 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
         raise
     except Exception as e:
         # Log the exception e here if you have a logger configured
-        print(f"Error in get_current_user: {e}") # Basic print for now
+        log.exception("get_current_user failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error in authentication")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
+
+# Dependency to get current caregiver's profile_id (from caregiver_profiles table)
+# get_user_by_id LEFT JOINs the profile tables, so caregiver_profile_id is already
+# on current_user and this dependency does no DB work of its own.
+async def get_current_caregiver_profile_id(current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'caregiver':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a caregiver")
+    caregiver_profile_id = current_user.get('caregiver_profile_id')
+    if caregiver_profile_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Caregiver profile not found for this user.")
+    return caregiver_profile_id
+
+# Dependency to get current family's profile_id (from family_profiles table)
+# Pure Python for the same reason as get_current_caregiver_profile_id above.
+async def get_current_family_profile_id(current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'family':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a family member")
+    family_profile_id = current_user.get('family_profile_id')
+    if family_profile_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Family profile not found for this user.")
+    return family_profile_id
+
+# Dependency to check if current user is a participant in a conversation
+def get_conversation_if_participant(
+    conversation_id: int,
+    current_user: dict = Depends(get_current_user)
+) -> int: # Return conversation_id for convenience if participant
+    db_conn = None
+    try:
+        db_conn = db_utils.get_db_connection()
+        if not db_conn:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
+
+        is_participant = messaging_queries.check_user_in_conversation(db_conn, current_user['id'], conversation_id)
+        if not is_participant:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a participant in this conversation.")
+        return conversation_id # Or True, but returning ID might be useful
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("get_conversation_if_participant failed")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error verifying conversation participation.")
+    finally:
+        db_utils.release_connection(db_conn)
 
 
 @app.get("/")
@@ -187,7 +235,7 @@ async def root():
     return {"message": "Backend is running"}
 
 @app.post("/api/register", status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserCreate):
+def register_user(user_data: UserCreate):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -202,10 +250,8 @@ async def register_user(user_data: UserCreate):
         if existing_user_username:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken")
 
-        # Validate role against ENUM values in schema.sql for users.user_type
-        if user_data.role not in ['caregiver', 'family', 'admin']:
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role. Must be 'caregiver', 'family', or 'admin'.")
-
+        # Role is validated by Pydantic (Literal on UserCreate), so an invalid
+        # payload is rejected before the uniqueness queries above ever run.
         user_id = user_queries.create_user(
             db_conn,
             username=user_data.username,
@@ -220,14 +266,13 @@ async def register_user(user_data: UserCreate):
         raise
     except Exception as e:
         # Log the exception e
-        print(f"Error in register_user: {e}")
+        log.exception("register_user failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred during registration.")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 @app.post("/api/login", response_model=TokenData)
-async def login_for_access_token(form_data: UserLogin):
+def login_for_access_token(form_data: UserLogin):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -237,7 +282,12 @@ async def login_for_access_token(form_data: UserLogin):
         # get_user_by_email now returns specific fields including 'password' (hashed) and 'role' (aliased from 'user_type')
         user = user_queries.get_user_by_email(db_conn, form_data.email) 
         
-        # user['password'] contains the hashed password from the DB
+        # user['password'] contains the hashed password from the DB.
+        # On an unknown email, verify against a precomputed dummy hash so both
+        # outcomes pay one full bcrypt - otherwise the fast-fail leaks which
+        # emails are registered via response timing.
+        if not user:
+            auth_utils.verify_password(form_data.password, auth_utils.DUMMY_HASH)
         if not user or not auth_utils.verify_password(form_data.password, user['password']):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -264,22 +314,20 @@ async def login_for_access_token(form_data: UserLogin):
         raise
     except Exception as e:
         # Log the exception e
-        print(f"Error in login_for_access_token: {e}")
+        log.exception("login_for_access_token failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred during login.")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 @app.post("/api/logout")
-async def logout_user(current_user: dict = Depends(get_current_user), token: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+def logout_user(current_user: dict = Depends(get_current_user), token: str = Depends(get_bearer_token)):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
         if db_conn is None:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
-        token_str = token.credentials
-        deleted = auth_utils.delete_token(db_conn, token_str)
+        deleted = auth_utils.delete_token(db_conn, token)
         if deleted:
             return {"message": "Successfully logged out"}
         else:
@@ -290,38 +338,14 @@ async def logout_user(current_user: dict = Depends(get_current_user), token: HTT
         raise
     except Exception as e:
         # Log the exception e
-        print(f"Error in logout_user: {e}")
+        log.exception("logout_user failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An error occurred during logout.")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
             
-# Example protected endpoint
-@app.get("/api/users/me", response_model=user_queries.get_user_by_id.__annotations__.get('return')) # Attempt to use model from query
-async def read_users_me(current_user: dict = Depends(get_current_user)):
-    # current_user is the dict {'id': ..., 'email': ..., 'role': ..., 'first_name': ..., 'last_name': ..., 'is_active': ...}
-    # as returned by user_queries.get_user_by_id
-    return current_user
-
-# It's good practice to define a Pydantic model for the response of /api/users/me
-# For example:
-class UserResponse(BaseModel):
-    id: int
-    username: str
-    email: EmailStr
-    role: str
-    first_name: str | None = None
-    last_name: str | None = None
-    is_active: bool
-
-# And then use it:
-# @app.get("/api/users/me", response_model=UserResponse)
-# async def read_users_me(current_user: UserResponse = Depends(get_current_user)):
-#     return current_user
-# However, Depends(get_current_user) returns a dict.
-# FastAPI will validate the dict against UserResponse if UserResponse is set as response_model.
-
-# Corrected /api/users/me with a defined Pydantic response model
+# Protected endpoint returning the authenticated user's own data.
+# The previous reflective response_model (get_user_by_id.__annotations__) resolved
+# to None, so the raw user dict leaked fields like is_active; UserPublic is explicit.
 class UserPublic(BaseModel):
     id: int
     username: str
@@ -331,18 +355,18 @@ class UserPublic(BaseModel):
     last_name: str | None = None
     # Do not include is_active or other sensitive fields unless intended for public display via this endpoint
 
-@app.get("/api/users/me_v2", response_model=UserPublic) # Changed path to avoid conflict, using _v2
-async def read_users_me_v2(current_user: dict = Depends(get_current_user)):
+@app.get("/api/users/me", response_model=UserPublic, response_model_exclude_none=True)
+async def read_users_me(current_user: dict = Depends(get_current_user)):
     # current_user is a dict from get_user_by_id
     # It will be validated against UserPublic by FastAPI
     return current_user
 
 # Profile Management Endpoints
 
-@app.get("/api/profile/me", 
-         response_model=Union[schemas.CaregiverProfileResponse, schemas.FamilyProfileResponse, schemas.UserBaseResponse],
-         tags=["Profiles"])
-async def get_my_profile(current_user: dict = Depends(get_current_user)):
+# No Union response_model: the role string picks the exact variant below, so
+# FastAPI doesn't trial-validate the union members a second time on the way out.
+@app.get("/api/profile/me", tags=["Profiles"])
+def get_my_profile(current_user: dict = Depends(get_current_user)):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -356,26 +380,20 @@ async def get_my_profile(current_user: dict = Depends(get_current_user)):
         if not profile_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
 
-        if user_role == 'caregiver':
-            return schemas.CaregiverProfileResponse.model_validate(profile_data)
-        elif user_role == 'family':
-            return schemas.FamilyProfileResponse.model_validate(profile_data)
-        else: # E.g. admin or other roles that don't have a specific profile type
-            return schemas.UserBaseResponse.model_validate(profile_data)
-            
+        # admin and other profile-less roles fall back to UserBaseResponse
+        return schemas.profile_response_for(user_role).model_validate(profile_data)
+
+
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_my_profile: {e}")
+        log.exception("get_my_profile failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving profile")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
-@app.put("/api/profile/me", 
-         response_model=Union[schemas.CaregiverProfileResponse, schemas.FamilyProfileResponse, schemas.UserBaseResponse],
-         tags=["Profiles"])
-async def update_my_profile(profile_update_data: schemas.ProfileUpdateMe, current_user: dict = Depends(get_current_user)):
+@app.put("/api/profile/me", tags=["Profiles"])
+def update_my_profile(profile_update_data: schemas.ProfileUpdateMe, current_user: dict = Depends(get_current_user)):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -389,6 +407,8 @@ async def update_my_profile(profile_update_data: schemas.ProfileUpdateMe, curren
         update_data_dict = profile_update_data.model_dump(exclude_unset=True)
         
         success = profile_queries.update_user_profile(db_conn, user_id, user_role, update_data_dict)
+        # The update may have created a profile row, so drop any cached mapping
+        profile_lookup.invalidate(user_id)
         if not success:
             # This condition might be hard to trigger if update_user_profile raises exceptions on failure
             # Consider if update_user_profile should return False or raise specific error
@@ -399,24 +419,21 @@ async def update_my_profile(profile_update_data: schemas.ProfileUpdateMe, curren
         if not updated_profile_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Updated profile not found, update may have failed")
 
-        if user_role == 'caregiver':
-            return schemas.CaregiverProfileResponse.model_validate(updated_profile_data)
-        elif user_role == 'family':
-            return schemas.FamilyProfileResponse.model_validate(updated_profile_data)
-        else:
-            return schemas.UserBaseResponse.model_validate(updated_profile_data)
+        return schemas.profile_response_for(user_role).model_validate(updated_profile_data)
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in update_my_profile: {e}")
+        log.exception("update_my_profile failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating profile")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
-@app.get("/api/caregivers/{user_id}", response_model=schemas.PublicCaregiverProfileResponse, tags=["Profiles"])
-async def get_public_caregiver_profile(user_id: int):
+# No fixed response_model: the handler returns the full or compact variant
+# depending on ?compact=1, and either is already validated before return.
+@app.get("/api/caregivers/{user_id}", tags=["Profiles"])
+def get_public_caregiver_profile(user_id: int, request: Request, response: Response,
+                                 compact: bool = Query(False)):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -426,20 +443,33 @@ async def get_public_caregiver_profile(user_id: int):
         profile_data = profile_queries.get_caregiver_public_profile(db_conn, user_id)
         if not profile_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Caregiver profile not found or user is not an active caregiver")
-        
+
+        # Conditional GET: the profile version is UNIX_TIMESTAMP(updated_at) from
+        # the query, so repeat visits skip serialization and the body bytes entirely.
+        etag = make_profile_etag(user_id, profile_data, "-c" if compact else "")
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+        if compact:
+            # ?compact=1: non-null columns packed into one extras dict - four
+            # validated fields instead of ~15 for sparse rows
+            return schemas.compact_public_profile(
+                schemas.PublicCaregiverProfileResponseCompact, profile_data
+            )
         # profile_data is a dict from the query, Pydantic will validate it
         return schemas.PublicCaregiverProfileResponse.model_validate(profile_data)
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_public_caregiver_profile: {e}")
+        log.exception("get_public_caregiver_profile failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving caregiver profile")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
-@app.get("/api/families/{user_id}", response_model=schemas.PublicFamilyProfileResponse, tags=["Profiles"])
-async def get_public_family_profile(user_id: int):
+@app.get("/api/families/{user_id}", tags=["Profiles"])
+def get_public_family_profile(user_id: int, request: Request, response: Response,
+                              compact: bool = Query(False)):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -449,16 +479,25 @@ async def get_public_family_profile(user_id: int):
         profile_data = profile_queries.get_family_public_profile(db_conn, user_id)
         if not profile_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Family profile not found or user is not an active family member")
-            
+
+        # Conditional GET, same scheme as the public caregiver profile
+        etag = make_profile_etag(user_id, profile_data, "-c" if compact else "")
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+        if compact:
+            return schemas.compact_public_profile(
+                schemas.PublicFamilyProfileResponseCompact, profile_data
+            )
         return schemas.PublicFamilyProfileResponse.model_validate(profile_data)
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_public_family_profile: {e}")
+        log.exception("get_public_family_profile failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving family profile")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 # Original health check from previous setup
 # The one defined earlier is fine.
@@ -472,7 +511,7 @@ async def get_public_family_profile(user_id: int):
 # --- Photo Endpoints ---
 
 @caregiver_router.post("/me/photos", response_model=schemas.PhotoResponse, status_code=status.HTTP_201_CREATED)
-async def upload_my_photo(
+def upload_my_photo(
     photo_data: schemas.PhotoCreate, 
     caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
 ):
@@ -496,15 +535,19 @@ async def upload_my_photo(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in upload_my_photo: {e}")
+        log.exception("upload_my_photo failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error uploading photo")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 # Public endpoint to get photos for a specific caregiver by their user_id
-@app.get("/api/caregivers/{caregiver_user_id}/photos", response_model=List[schemas.PhotoResponse], tags=["Caregiver Public"])
-async def get_caregiver_photos_public(caregiver_user_id: int):
+@app.get("/api/caregivers/{caregiver_user_id}/photos", response_model=schemas.CursorPage[schemas.PhotoResponse], tags=["Caregiver Public"])
+def get_caregiver_photos_public(
+    caregiver_user_id: int,
+    request: Request,
+    after: str | None = Query(None, description="Opaque cursor from the previous page's next_cursor"),
+    limit: int = Query(50, ge=1, le=200)
+):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
@@ -512,29 +555,42 @@ async def get_caregiver_photos_public(caregiver_user_id: int):
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
         # First, get caregiver_profile_id from caregiver_user_id (users.id)
-        cursor = db_conn.cursor(dictionary=True)
-        cursor.execute("SELECT id FROM caregiver_profiles WHERE user_id = %s", (caregiver_user_id,))
+        # Same hoisted statement as the dependency above, via a prepared cursor.
+        cursor = db_conn.cursor(prepared=True)
+        cursor.execute(SQL_CAREGIVER_PROFILE_ID_BY_USER, (caregiver_user_id,))
         cg_profile = cursor.fetchone()
         cursor.close() # Close cursor after use
 
         if not cg_profile:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Caregiver profile not found for this user ID")
-        
-        caregiver_profile_id_for_photos = cg_profile['id']
-        
-        photos_data = caregiver_queries.get_caregiver_photos(db_conn, caregiver_profile_id_for_photos)
-        return [schemas.PhotoResponse.model_validate(photo) for photo in photos_data]
+
+        caregiver_profile_id_for_photos = cg_profile[0]
+
+        # Cursor encodes the (uploaded_at, id) tuple of the last row of the previous page
+        after_tuple = tuple(decode_cursor(after, 2)) if after else None
+        # MySQL builds the JSON array server-side (JSON_ARRAYAGG); we just wrap it
+        # with the cursor metadata and forward the bytes - no per-row Python objects.
+        items_json, next_after = caregiver_queries.get_caregiver_photos_json(
+            db_conn, caregiver_profile_id_for_photos, after=after_tuple, limit=limit
+        )
+        next_cursor_json = f'"{encode_cursor(*next_after)}"' if next_after else "null"
+        body = f'{{"items":{items_json},"next_cursor":{next_cursor_json}}}'
+        # Photos have no single updated_at to version on, so hash the page body;
+        # matched If-None-Match saves the bytes over the wire.
+        etag = f'W/"{hashlib.md5(body.encode()).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_caregiver_photos_public: {e}")
+        log.exception("get_caregiver_photos_public failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving caregiver photos")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 @caregiver_router.delete("/me/photos/{photo_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_my_photo(
+def delete_my_photo(
     photo_id: int, 
     caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
 ):
@@ -560,16 +616,15 @@ async def delete_my_photo(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in delete_my_photo: {e}")
+        log.exception("delete_my_photo failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting photo")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 # --- Availability Slot Endpoints ---
 
 @caregiver_router.post("/me/availability-slots", response_model=schemas.AvailabilitySlotResponse, status_code=status.HTTP_201_CREATED)
-async def add_my_availability_slot(
+def add_my_availability_slot(
     slot_data: schemas.AvailabilitySlotCreate,
     caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
 ):
@@ -579,52 +634,85 @@ async def add_my_availability_slot(
         if not db_conn:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
-        # Ensure day_of_week is passed as string value of enum
+        # The DB column is ENUM of day names, so pass the IntEnum member's name
         slot_id = caregiver_queries.create_availability_slot(
-            db_conn, caregiver_profile_id, slot_data.day_of_week.value, slot_data.start_time, slot_data.end_time
+            db_conn, caregiver_profile_id, slot_data.day_of_week.name, slot_data.start_time, slot_data.end_time
         )
         if not slot_id:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create availability slot")
 
-        created_slot = caregiver_queries.get_availability_slot_by_id(db_conn, slot_id)
-        if not created_slot:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve created slot")
-        return schemas.AvailabilitySlotResponse.model_validate(created_slot)
+        # Every response field is known from the inputs plus lastrowid, so the
+        # read-back SELECT that used to follow the insert is gone.
+        return schemas.AvailabilitySlotResponse(
+            id=slot_id,
+            caregiver_profile_id=caregiver_profile_id,
+            day_of_week=slot_data.day_of_week,
+            # Response times are pre-formatted strings (see the slot queries)
+            start_time=slot_data.start_time.isoformat(),
+            end_time=slot_data.end_time.isoformat(),
+        )
     except HTTPException:
         raise
     except Exception as e: # Catch potential duplicate entry errors from DB (e.g. unique constraint violation)
-        print(f"Error in add_my_availability_slot: {e}")
+        log.exception("add_my_availability_slot failed")
         # Check for specific MySQL error codes for duplicate entry if possible, e.g., e.errno == 1062
         if hasattr(e, 'errno') and e.errno == 1062: # MySQL error code for duplicate entry
              raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This availability slot already exists.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating availability slot")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
-@caregiver_router.get("/me/availability-slots", response_model=List[schemas.AvailabilitySlotResponse])
-async def get_my_availability_slots(
-    caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
+@caregiver_router.get("/me/availability-slots", response_model=schemas.CursorPage[schemas.AvailabilitySlotResponse])
+def get_my_availability_slots(
+    caregiver_profile_id: int = Depends(get_current_caregiver_profile_id),
+    after: str | None = Query(None, description="Opaque cursor from the previous page's next_cursor"),
+    limit: int = Query(50, ge=1, le=200)
 ):
     db_conn = None
     try:
         db_conn = db_utils.get_db_connection()
         if not db_conn:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
-        
-        slots_data = caregiver_queries.get_availability_slots_for_caregiver(db_conn, caregiver_profile_id)
-        return [schemas.AvailabilitySlotResponse.model_validate(slot) for slot in slots_data]
+
+        # Slots are keyset-paginated on id (creation order)
+        after_id = int(decode_cursor(after, 1)[0]) if after else None
+        slots_data = caregiver_queries.get_availability_slots_for_caregiver(
+            db_conn, caregiver_profile_id, after_id=after_id, limit=limit
+        )
+        has_more = len(slots_data) > limit
+        slots_data = slots_data[:limit]
+        next_cursor = encode_cursor(slots_data[-1]['id']) if has_more else None
+
+        # Stream the page: one row serialized per chunk, so we never hold the
+        # full JSON body alongside the row dicts, and the first bytes go out
+        # before the last row is serialized. The query projects JSON-ready
+        # values already (ENUM day name, TIME_FORMAT'ed 'HH:MM:SS' strings),
+        # so each row goes straight to orjson - no model_validate/
+        # model_dump_json round-trip through Python per row. Rows themselves
+        # are fetched eagerly above because the pooled connection is returned
+        # in the finally block, before the response body generator runs.
+        def slot_page_stream():
+            yield b'{"items":['
+            first = True
+            for slot in slots_data:
+                if not first:
+                    yield b','
+                yield orjson.dumps(slot, default=str)
+                first = False
+            next_cursor_json = f'"{next_cursor}"' if next_cursor else "null"
+            yield f'],"next_cursor":{next_cursor_json}}}'.encode()
+
+        return StreamingResponse(slot_page_stream(), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_my_availability_slots: {e}")
+        log.exception("get_my_availability_slots failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving availability slots")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 @caregiver_router.get("/me/availability-slots/{slot_id}", response_model=schemas.AvailabilitySlotResponse)
-async def get_my_availability_slot_detail(
+def get_my_availability_slot_detail(
     slot_id: int,
     caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
 ):
@@ -645,14 +733,13 @@ async def get_my_availability_slot_detail(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_my_availability_slot_detail: {e}")
+        log.exception("get_my_availability_slot_detail failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving availability slot")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 @caregiver_router.put("/me/availability-slots/{slot_id}", response_model=schemas.AvailabilitySlotResponse)
-async def update_my_availability_slot(
+def update_my_availability_slot(
     slot_id: int,
     slot_update_data: schemas.AvailabilitySlotUpdate,
     caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
@@ -663,37 +750,45 @@ async def update_my_availability_slot(
         if not db_conn:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
-        slot_to_update = caregiver_queries.get_availability_slot_by_id(db_conn, slot_id)
-        if not slot_to_update:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Availability slot not found")
-        
-        if slot_to_update['caregiver_profile_id'] != caregiver_profile_id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this availability slot")
-
-        # Prepare data for update: use provided values or existing ones if not provided
-        update_data = slot_update_data.model_dump(exclude_unset=True)
-        
-        current_day = schemas.DayOfWeekEnum(slot_to_update['day_of_week'])
-        day_to_update = update_data.get('day_of_week', current_day).value # .value to get string
-        
-        current_start_time = slot_to_update['start_time']
-        start_time_to_update = update_data.get('start_time', current_start_time)
-        
-        current_end_time = slot_to_update['end_time']
-        end_time_to_update = update_data.get('end_time', current_end_time)
-
-        if not (day_to_update and start_time_to_update and end_time_to_update):
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing fields for update")
-
-
-        updated_count = caregiver_queries.update_availability_slot(
-            db_conn, slot_id, day_to_update, start_time_to_update, end_time_to_update
+        # Single authorize-and-update statement: ownership is checked in the
+        # UPDATE's WHERE clause and unset fields fall through via COALESCE, so
+        # the old fetch-then-update round-trips are gone from the happy path.
+        # mode='json': day_of_week becomes its name and times become
+        # 'HH:MM:SS' strings - the forms both the ENUM/TIME columns and the
+        # string-typed response fields expect.
+        update_data = slot_update_data.model_dump(mode='json', exclude_unset=True)
+
+        updated = caregiver_queries.update_availability_slot(
+            db_conn, slot_id, caregiver_profile_id,
+            # model_dump serializes day_of_week to its name string, which is
+            # what the ENUM column stores
+            day_of_week=update_data.get('day_of_week'),
+            start_time=update_data.get('start_time'),
+            end_time=update_data.get('end_time')
         )
-        if not updated_count:
-            # This could mean the slot wasn't found or data was identical (though updated_at should change)
-            # Or a concurrent modification problem.
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update availability slot")
+        if not updated:
+            # Cold path only: rowcount 0 means not-found, not-owned, or a
+            # no-op update - MySQL counts only changed rows, and repeating
+            # identical values within the same second leaves even updated_at
+            # unchanged (NOW() has 1-second granularity). Check ownership on
+            # the fetched row before deciding 403.
+            slot = caregiver_queries.get_availability_slot_by_id(db_conn, slot_id)
+            if not slot:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Availability slot not found")
+            if slot['caregiver_profile_id'] != caregiver_profile_id:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this availability slot")
+            # Owned, values already as requested: report the slot as stored.
+            return schemas.AvailabilitySlotResponse.model_validate(slot)
+
+        if all(k in update_data for k in ('day_of_week', 'start_time', 'end_time')):
+            # Full update: the response is fully determined by the payload, so
+            # skip the read-back SELECT (MySQL has no UPDATE ... RETURNING).
+            return schemas.AvailabilitySlotResponse(
+                id=slot_id, caregiver_profile_id=caregiver_profile_id, **update_data
+            )
 
+        # Partial update: fields left unset kept their stored values via
+        # COALESCE, so one read-back is still needed to report them.
         updated_slot = caregiver_queries.get_availability_slot_by_id(db_conn, slot_id)
         if not updated_slot: # Should not happen if update was successful
              raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve updated slot")
@@ -701,16 +796,15 @@ async def update_my_availability_slot(
     except HTTPException:
         raise
     except Exception as e: # Catch potential duplicate entry errors from DB
-        print(f"Error in update_my_availability_slot: {e}")
+        log.exception("update_my_availability_slot failed")
         if hasattr(e, 'errno') and e.errno == 1062: # MySQL error code for duplicate entry
              raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This availability slot configuration already exists for another slot.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating availability slot")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 @caregiver_router.delete("/me/availability-slots/{slot_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_my_availability_slot(
+def delete_my_availability_slot(
     slot_id: int,
     caregiver_profile_id: int = Depends(get_current_caregiver_profile_id)
 ):
@@ -720,34 +814,69 @@ async def delete_my_availability_slot(
         if not db_conn:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
-        slot_to_delete = caregiver_queries.get_availability_slot_by_id(db_conn, slot_id)
-        if not slot_to_delete:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Availability slot not found")
-        
-        if slot_to_delete['caregiver_profile_id'] != caregiver_profile_id:
+        # Ownership is enforced in the DELETE's WHERE clause - one statement
+        deleted = caregiver_queries.delete_availability_slot(db_conn, slot_id, caregiver_profile_id)
+        if not deleted:
+            # Cold path only: distinguish not-found from not-owned
+            slot = caregiver_queries.get_availability_slot_by_id(db_conn, slot_id)
+            if not slot:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Availability slot not found or already deleted")
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this availability slot")
 
-        deleted = caregiver_queries.delete_availability_slot(db_conn, slot_id)
-        if not deleted:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Availability slot not found or already deleted")
-        
         # No content to return
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in delete_my_availability_slot: {e}")
+        log.exception("delete_my_availability_slot failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting availability slot")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 app.include_router(caregiver_router)
 
 
 # --- Listing & Search Endpoints ---
 
-@list_router.get("/api/caregivers/", response_model=schemas.PaginatedResponse[schemas.PublicCaregiverProfileResponse])
-async def list_all_caregivers(
+# No response_model on the list endpoints: the query layer already projects
+# exactly the public columns, so re-validating every row of every page through
+# PaginatedResponse[...] was pure per-field CPU. Pages are serialized once
+# with orjson and kept in list_cache for a short TTL keyed by
+# (endpoint, filters, page, page_size); cache hits skip the DB and
+# serialization entirely, and If-None-Match lets clients skip the body too.
+def serve_cached_list(request: Request, body: bytes, etag: str) -> Response:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Pages above this size bypass the body cache and stream row-by-row instead.
+LIST_STREAM_THRESHOLD = 50
+
+def stream_list_page(meta: dict, results: list) -> StreamingResponse:
+    """
+    Serialize a large page incrementally: one orjson.dumps per row, so the
+    complete JSON body is never resident alongside the row dicts. Rows are
+    already fetched (the pooled connection goes back before the generator
+    runs, same caveat as the availability-slots stream); only serialization
+    and sending are deferred.
+    """
+    def page_stream():
+        head = orjson.dumps(meta, default=str)
+        yield head[:-1] + b',"results":[' # reopen the meta object and start the rows array
+        first = True
+        for row in results:
+            if not first:
+                yield b','
+            yield orjson.dumps(row, default=str)
+            first = False
+        yield b']}'
+    return StreamingResponse(page_stream(), media_type="application/json")
+
+# response_model here is documentation only: the handlers return prebuilt
+# Response objects, which FastAPI never re-validates, so PaginatedResponse
+# stays an OpenAPI shell off the hot path.
+@list_router.get("/api/caregivers/",
+                 response_model=schemas.PaginatedResponse[schemas.PublicCaregiverProfileResponse])
+def list_all_caregivers(
     request: Request,
     filters: schemas.CaregiverFilterParams = Depends(),
     page: int = Query(1, ge=1),
@@ -755,49 +884,60 @@ async def list_all_caregivers(
 ):
     db_conn = None
     try:
+        # Use model_dump(exclude_none=True) for Pydantic v2+
+        # For Pydantic v1, it would be filters.dict(exclude_none=True)
+        filter_data = filters.model_dump(exclude_none=True)
+
+        cache_key = list_cache.make_key("caregivers", filter_data, page, page_size)
+        if page_size <= LIST_STREAM_THRESHOLD:
+            cached = list_cache.get(cache_key)
+            if cached:
+                return serve_cached_list(request, cached[0], cached[1])
+
         db_conn = db_utils.get_db_connection()
         if not db_conn:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
-        # Use model_dump(exclude_none=True) for Pydantic v2+
-        # For Pydantic v1, it would be filters.dict(exclude_none=True)
-        filter_data = filters.model_dump(exclude_none=True)
-        
         results, total_count = listing_queries.list_caregiver_profiles(
             db_conn, filters=filter_data, page=page, page_size=page_size
         )
 
         total_pages = math.ceil(total_count / page_size)
-        
+
         next_page_url = None
         if page < total_pages:
             next_page_url = str(request.url.replace_query_params(page=page + 1))
-            
+
         previous_page_url = None
         if page > 1:
             previous_page_url = str(request.url.replace_query_params(page=page - 1))
 
-        # FastAPI will validate each item in results against PublicCaregiverProfileResponse
-        return schemas.PaginatedResponse(
-            count=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages,
-            next_page_url=next_page_url,
-            previous_page_url=previous_page_url,
-            results=results # results are already list of dicts from query
-        )
+        # results are already list of dicts with the public projection from the
+        # query layer; serialize as-is (default=str covers Decimal columns).
+        meta = {
+            "count": total_count,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "next_page_url": next_page_url,
+            "previous_page_url": previous_page_url,
+        }
+        if page_size > LIST_STREAM_THRESHOLD:
+            return stream_list_page(meta, results)
+        body = orjson.dumps({**meta, "results": results}, default=str)
+        etag = list_cache.put(cache_key, body)
+        return serve_cached_list(request, body, etag)
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in list_all_caregivers: {e}")
+        log.exception("list_all_caregivers failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error listing caregiver profiles")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
-@list_router.get("/api/families/", response_model=schemas.PaginatedResponse[schemas.PublicFamilyProfileResponse])
-async def list_all_families(
+@list_router.get("/api/families/", # same fast path as /api/caregivers/ above
+                 response_model=schemas.PaginatedResponse[schemas.PublicFamilyProfileResponse])
+def list_all_families(
     request: Request,
     filters: schemas.FamilyFilterParams = Depends(),
     page: int = Query(1, ge=1),
@@ -806,43 +946,54 @@ async def list_all_families(
 ):
     db_conn = None
     try:
+        filter_data = filters.model_dump(exclude_none=True)
+
+        # The listing is the same for every authenticated user, so the cache
+        # key deliberately excludes current_user.
+        cache_key = list_cache.make_key("families", filter_data, page, page_size)
+        if page_size <= LIST_STREAM_THRESHOLD:
+            cached = list_cache.get(cache_key)
+            if cached:
+                return serve_cached_list(request, cached[0], cached[1])
+
         db_conn = db_utils.get_db_connection()
         if not db_conn:
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database connection error")
 
-        filter_data = filters.model_dump(exclude_none=True)
-        
         results, total_count = listing_queries.list_family_profiles(
             db_conn, filters=filter_data, page=page, page_size=page_size
         )
 
         total_pages = math.ceil(total_count / page_size)
-        
+
         next_page_url = None
         if page < total_pages:
             next_page_url = str(request.url.replace_query_params(page=page + 1))
-            
+
         previous_page_url = None
         if page > 1:
             previous_page_url = str(request.url.replace_query_params(page=page - 1))
 
-        return schemas.PaginatedResponse(
-            count=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages,
-            next_page_url=next_page_url,
-            previous_page_url=previous_page_url,
-            results=results
-        )
+        meta = {
+            "count": total_count,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "next_page_url": next_page_url,
+            "previous_page_url": previous_page_url,
+        }
+        if page_size > LIST_STREAM_THRESHOLD:
+            return stream_list_page(meta, results)
+        body = orjson.dumps({**meta, "results": results}, default=str)
+        etag = list_cache.put(cache_key, body)
+        return serve_cached_list(request, body, etag)
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in list_all_families: {e}")
+        log.exception("list_all_families failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error listing family profiles")
     finally:
-        if db_conn and db_conn.is_connected():
-            db_conn.close()
+        db_utils.release_connection(db_conn)
 
 app.include_router(list_router)
 app.include_router(match_router) 
@@ -2,50 +2,45 @@
 import datetime
 from typing import List
 
+from . import db_utils
+
+# Statements run through db_utils.prepared_cursor are hoisted to module level:
+# the per-connection cursor cache is keyed by the SQL text, so the text must be
+# byte-identical on every call for the server-side plan to be reused.
+SQL_INSERT_MESSAGE = "INSERT INTO messages (conversation_id, sender_id, content, sent_at, is_read) VALUES (%s, %s, %s, NOW(), FALSE)"
+SQL_TOUCH_CONVERSATION = "UPDATE conversations SET updated_at = NOW() WHERE id = %s"
+SQL_CHECK_USER_IN_CONVERSATION = "SELECT 1 FROM conversation_participants WHERE user_id = %s AND conversation_id = %s LIMIT 1"
+SQL_MESSAGE_DETAILS_BY_ID = """
+    SELECT m.id, m.conversation_id, m.content AS text, m.sent_at AS timestamp, m.is_read,
+           s.id as sender_id, s.username as sender_username, s.email as sender_email,
+           s.first_name as sender_first_name, s.last_name as sender_last_name,
+           s.profile_picture as sender_profile_picture_url
+    FROM messages m
+    JOIN users s ON m.sender_id = s.id
+    WHERE m.id = %s
+"""
+
 def check_match_exists_for_conversation(db_conn, user1_id: int, user2_id: int) -> bool:
     """
     Checks if an 'accepted' match exists between user1_id and user2_id.
     Users can be in either family or caregiver role in the match.
-    This function handles the lookup of profile_ids from user_ids.
+    A single query joins through the profile tables and checks both
+    orientations at once (the old version issued up to 6 round-trips:
+    4 profile lookups plus a match query per orientation).
     """
     cursor = db_conn.cursor(dictionary=True)
     try:
-        # Get profile IDs for user1
-        cursor.execute("SELECT id FROM family_profiles WHERE user_id = %s", (user1_id,))
-        user1_family_profile = cursor.fetchone()
-        cursor.execute("SELECT id FROM caregiver_profiles WHERE user_id = %s", (user1_id,))
-        user1_caregiver_profile = cursor.fetchone()
-
-        # Get profile IDs for user2
-        cursor.execute("SELECT id FROM family_profiles WHERE user_id = %s", (user2_id,))
-        user2_family_profile = cursor.fetchone()
-        cursor.execute("SELECT id FROM caregiver_profiles WHERE user_id = %s", (user2_id,))
-        user2_caregiver_profile = cursor.fetchone()
-
-        match_found = False
-        # Scenario 1: user1 is family, user2 is caregiver
-        if user1_family_profile and user2_caregiver_profile:
-            query_match = """
-            SELECT 1 FROM match_requests 
-            WHERE family_profile_id = %s AND caregiver_profile_id = %s AND request_status = 'accepted'
-            LIMIT 1
-            """
-            cursor.execute(query_match, (user1_family_profile['id'], user2_caregiver_profile['id']))
-            if cursor.fetchone():
-                match_found = True
-        
-        # Scenario 2: user1 is caregiver, user2 is family
-        if not match_found and user1_caregiver_profile and user2_family_profile:
-            query_match = """
-            SELECT 1 FROM match_requests 
-            WHERE family_profile_id = %s AND caregiver_profile_id = %s AND request_status = 'accepted'
-            LIMIT 1
-            """
-            cursor.execute(query_match, (user2_family_profile['id'], user1_caregiver_profile['id']))
-            if cursor.fetchone():
-                match_found = True
-        
-        return match_found
+        query = """
+        SELECT 1
+        FROM match_requests mr
+        JOIN family_profiles fp ON mr.family_profile_id = fp.id
+        JOIN caregiver_profiles cp ON mr.caregiver_profile_id = cp.id
+        WHERE mr.request_status = 'accepted'
+          AND ((fp.user_id = %s AND cp.user_id = %s) OR (fp.user_id = %s AND cp.user_id = %s))
+        LIMIT 1
+        """
+        cursor.execute(query, (user1_id, user2_id, user2_id, user1_id))
+        return cursor.fetchone() is not None
     finally:
         cursor.close()
 
@@ -59,26 +54,24 @@ def find_existing_conversation(db_conn, participant_user_ids: List[int]):
     try:
         # Sort participant IDs to ensure consistent querying regardless of order
         p_sorted = sorted(participant_user_ids)
-        
-        # Query to find a conversation_id that has exactly these two participants
-        # and no others (implicitly handled by joining on itself and matching distinct user_ids).
-        # This query identifies conversations where both users are participants.
-        # It then checks if the total number of participants in that conversation is exactly 2.
+
+        # Self-join seeks directly on the two users' participant rows, then
+        # NOT EXISTS rejects conversations with any third participant. Unlike
+        # the previous nested GROUP BY, this never aggregates the whole
+        # conversation_participants table - it's index seeks on user_id only.
         query = """
-        SELECT cp.conversation_id
-        FROM conversation_participants cp
-        JOIN (
-            SELECT conversation_id
-            FROM conversation_participants
-            GROUP BY conversation_id
-            HAVING COUNT(user_id) = 2  -- Ensures only 2 participants in the conversation
-        ) AS valid_convos ON cp.conversation_id = valid_convos.conversation_id
-        WHERE cp.user_id IN (%s, %s)
-        GROUP BY cp.conversation_id
-        HAVING COUNT(DISTINCT cp.user_id) = 2 -- Ensures both specified users are in this group
+        SELECT cp1.conversation_id
+        FROM conversation_participants cp1
+        JOIN conversation_participants cp2 ON cp1.conversation_id = cp2.conversation_id
+        WHERE cp1.user_id = %s AND cp2.user_id = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM conversation_participants cp3
+              WHERE cp3.conversation_id = cp1.conversation_id
+                AND cp3.user_id NOT IN (%s, %s)
+          )
         LIMIT 1
         """
-        cursor.execute(query, (p_sorted[0], p_sorted[1]))
+        cursor.execute(query, (p_sorted[0], p_sorted[1], p_sorted[0], p_sorted[1]))
         result = cursor.fetchone()
         return result['conversation_id'] if result else None
     finally:
@@ -94,8 +87,17 @@ def create_conversation_and_participants(db_conn, participant_user_ids: List[int
         
         # Add participants to the conversation
         # schema.sql: conversation_participants has conversation_id, user_id, joined_at
-        participant_data = [(conversation_id, user_id) for user_id in participant_user_ids]
-        cursor.executemany("INSERT INTO conversation_participants (conversation_id, user_id, joined_at) VALUES (%s, %s, NOW())", participant_data)
+        # A single explicit multi-row INSERT guarantees one round-trip for all
+        # participants; executemany only batches when the driver manages to
+        # rewrite the statement, so we build the VALUES list ourselves.
+        values_clause = ", ".join(["(%s, %s, NOW())"] * len(participant_user_ids))
+        params = []
+        for user_id in participant_user_ids:
+            params.extend((conversation_id, user_id))
+        cursor.execute(
+            f"INSERT INTO conversation_participants (conversation_id, user_id, joined_at) VALUES {values_clause}",
+            tuple(params)
+        )
         
         db_conn.commit()
         return conversation_id
@@ -146,6 +148,10 @@ def get_conversations_for_user(db_conn, user_id: int, page: int = 1, page_size:
         total_count_result = cursor.fetchone()
         total_count = total_count_result['total_count'] if total_count_result else 0
 
+        if total_count == 0:
+            # Empty state (new users): skip the page join entirely.
+            return [], 0
+
         offset = (page - 1) * page_size
         query = """
         SELECT DISTINCT c.id as conversation_id
@@ -156,35 +162,107 @@ def get_conversations_for_user(db_conn, user_id: int, page: int = 1, page_size:
         LIMIT %s OFFSET %s
         """
         cursor.execute(query, (user_id, page_size, offset))
-        conversation_ids_data = cursor.fetchall()
-        
+        conversation_ids = [row['conversation_id'] for row in cursor.fetchall()]
+
+        if not conversation_ids:
+            return [], total_count
+
+        # Batch the page in 3 queries instead of 3 per conversation:
+        # the old per-row get_conversation_details_by_id loop cost 3*page_size
+        # round-trips; with IN (...) over the page's ids it is a constant 3.
+        placeholders = ", ".join(["%s"] * len(conversation_ids))
+        params = tuple(conversation_ids)
+
+        # (a) conversation rows
+        cursor.execute(f"SELECT id, created_at, updated_at FROM conversations WHERE id IN ({placeholders})", params)
+        convos_by_id = {row['id']: row for row in cursor.fetchall()}
+
+        # (b) all participants for the page
+        # schema.sql: users.profile_picture
+        p_query = f"""
+            SELECT cp.conversation_id, u.id as user_id, u.username, u.email, u.first_name, u.last_name,
+                   u.profile_picture AS profile_picture_url
+            FROM users u
+            JOIN conversation_participants cp ON u.id = cp.user_id
+            WHERE cp.conversation_id IN ({placeholders})
+        """
+        cursor.execute(p_query, params)
+        for row in cursor.fetchall():
+            convo = convos_by_id.get(row.pop('conversation_id'))
+            if convo is not None:
+                convo.setdefault('participants', []).append(row)
+
+        # (c) last message preview per conversation, picked with a window function
+        lm_query = f"""
+            SELECT conversation_id, text, timestamp
+            FROM (
+                SELECT conversation_id, content AS text, sent_at AS timestamp,
+                       ROW_NUMBER() OVER (PARTITION BY conversation_id ORDER BY sent_at DESC) AS rn
+                FROM messages
+                WHERE conversation_id IN ({placeholders})
+            ) ranked
+            WHERE rn = 1
+        """
+        cursor.execute(lm_query, params)
+        last_message_by_convo = {
+            row['conversation_id']: {'text': row['text'], 'timestamp': row['timestamp']}
+            for row in cursor.fetchall()
+        }
+
         detailed_conversations = []
-        if conversation_ids_data: # Only proceed if there are conversations
-            for row in conversation_ids_data:
-                # Use a new cursor for sub-queries or ensure the main cursor isn't closed prematurely if reused.
-                # For simplicity with N+1, get_conversation_details_by_id handles its own cursor.
-                convo_detail = get_conversation_details_by_id(db_conn, row['conversation_id'])
-                if convo_detail:
-                    detailed_conversations.append(convo_detail)
-        
+        for conversation_id in conversation_ids: # keep the page's updated_at DESC order
+            convo = convos_by_id.get(conversation_id)
+            if convo is None:
+                continue
+            convo.setdefault('participants', [])
+            convo['last_message'] = last_message_by_convo.get(conversation_id)
+            detailed_conversations.append(convo)
+
         return detailed_conversations, total_count
     finally:
         cursor.close() # Ensure the main cursor for this function is closed
 
 def create_message(db_conn, conversation_id: int, sender_user_id: int, text: str):
+    try:
+        # schema.sql: messages.content, messages.sent_at, messages.sender_id
+        # Prepared cursors from the per-connection cache; not closed here.
+        cursor = db_utils.prepared_cursor(db_conn, SQL_INSERT_MESSAGE, dictionary=False)
+        cursor.execute(SQL_INSERT_MESSAGE, (conversation_id, sender_user_id, text))
+        message_id = cursor.lastrowid
+
+        touch_cursor = db_utils.prepared_cursor(db_conn, SQL_TOUCH_CONVERSATION, dictionary=False)
+        touch_cursor.execute(SQL_TOUCH_CONVERSATION, (conversation_id,))
+
+        db_conn.commit()
+        return message_id
+    except Exception as e:
+        db_conn.rollback()
+        raise e
+
+def create_message_and_mark_read(db_conn, conversation_id: int, sender_user_id: int, text: str):
+    """
+    Bundles the open-conversation write pattern (send a message + mark the other
+    side's messages as read) under a single transaction. One commit means one
+    redo-log flush for the whole logical action, instead of one per call when
+    create_message and mark_messages_as_read commit separately.
+    Returns (message_id, marked_read_count).
+    """
     cursor = db_conn.cursor()
     try:
-        # schema.sql: messages.content, messages.sent_at
+        # schema.sql: messages.content, messages.sent_at, messages.sender_id
         msg_query = "INSERT INTO messages (conversation_id, sender_id, content, sent_at, is_read) VALUES (%s, %s, %s, NOW(), FALSE)"
-        # Note: schema.sql has messages.sender_id, not sender_user_id. Correcting here.
         cursor.execute(msg_query, (conversation_id, sender_user_id, text))
         message_id = cursor.lastrowid
-            
+
         convo_update_query = "UPDATE conversations SET updated_at = NOW() WHERE id = %s"
         cursor.execute(convo_update_query, (conversation_id,))
-            
+
+        mark_read_query = "UPDATE messages SET is_read = TRUE WHERE conversation_id = %s AND sender_id != %s AND is_read = FALSE"
+        cursor.execute(mark_read_query, (conversation_id, sender_user_id))
+        marked_read_count = cursor.rowcount
+
         db_conn.commit()
-        return message_id
+        return message_id, marked_read_count
     except Exception as e:
         db_conn.rollback()
         raise e
@@ -192,51 +270,46 @@ def create_message(db_conn, conversation_id: int, sender_user_id: int, text: str
         cursor.close()
 
 def get_message_details_by_id(db_conn, message_id: int):
-    cursor = db_conn.cursor(dictionary=True)
-    try:
-        # schema.sql: messages.content, messages.sent_at, messages.sender_id
-        # schema.sql: users.profile_picture
-        query = """
-            SELECT m.id, m.conversation_id, m.content AS text, m.sent_at AS timestamp, m.is_read,
-                   s.id as sender_id, s.username as sender_username, s.email as sender_email, 
-                   s.first_name as sender_first_name, s.last_name as sender_last_name, 
-                   s.profile_picture as sender_profile_picture_url
-            FROM messages m
-            JOIN users s ON m.sender_id = s.id  -- Corrected: m.sender_id
-            WHERE m.id = %s
-        """
-        cursor.execute(query, (message_id,))
-        msg_data = cursor.fetchone()
-        return msg_data
-    finally:
-        cursor.close()
+    # schema.sql: messages.content, messages.sent_at, messages.sender_id
+    # schema.sql: users.profile_picture
+    # Runs once per sent message, so it goes through the prepared-cursor cache.
+    cursor = db_utils.prepared_cursor(db_conn, SQL_MESSAGE_DETAILS_BY_ID)
+    cursor.execute(SQL_MESSAGE_DETAILS_BY_ID, (message_id,))
+    return cursor.fetchone()
 
 def get_messages_for_conversation(db_conn, conversation_id: int, page: int = 1, page_size: int = 10):
     cursor = db_conn.cursor(dictionary=True)
     try:
-        count_query = "SELECT COUNT(id) as total_count FROM messages WHERE conversation_id = %s"
-        cursor.execute(count_query, (conversation_id,))
-        total_count_result = cursor.fetchone()
-        total_count = total_count_result['total_count'] if total_count_result else 0
-
         offset = (page - 1) * page_size
-        # schema.sql: messages.sent_at
+        # One round-trip for the page: message + sender columns in a single JOIN
+        # (the old version selected ids then called get_message_details_by_id per
+        # row - page_size+2 queries), with the total folded in as a window COUNT.
         query = """
-        SELECT id as message_id FROM messages 
-        WHERE conversation_id = %s 
-        ORDER BY sent_at DESC  -- Corrected: sent_at
+        SELECT m.id, m.conversation_id, m.content AS text, m.sent_at AS timestamp, m.is_read,
+               s.id as sender_id, s.username as sender_username, s.email as sender_email,
+               s.first_name as sender_first_name, s.last_name as sender_last_name,
+               s.profile_picture as sender_profile_picture_url,
+               COUNT(*) OVER () AS total_count
+        FROM messages m
+        JOIN users s ON m.sender_id = s.id
+        WHERE m.conversation_id = %s
+        ORDER BY m.sent_at DESC
         LIMIT %s OFFSET %s
         """
         cursor.execute(query, (conversation_id, page_size, offset))
-        message_ids_data = cursor.fetchall()
-        
-        detailed_messages = []
-        if message_ids_data: # Only proceed if there are messages
-            for row in message_ids_data:
-                msg_detail = get_message_details_by_id(db_conn, row['message_id'])
-                if msg_detail:
-                    detailed_messages.append(msg_detail)
-        
+        detailed_messages = cursor.fetchall()
+
+        if detailed_messages:
+            total_count = detailed_messages[0]['total_count']
+            for msg in detailed_messages:
+                msg.pop('total_count', None) # bookkeeping column, not part of the message dict
+        else:
+            # Page beyond the end: the window count comes back empty, so fall
+            # back to a plain COUNT to keep the total accurate.
+            cursor.execute("SELECT COUNT(id) as total_count FROM messages WHERE conversation_id = %s", (conversation_id,))
+            total_count_result = cursor.fetchone()
+            total_count = total_count_result['total_count'] if total_count_result else 0
+
         return detailed_messages, total_count
     finally:
         cursor.close() # Ensure the main cursor for this function is closed
@@ -258,10 +331,8 @@ def mark_messages_as_read(db_conn, conversation_id: int, recipient_user_id: int)
         cursor.close()
 
 def check_user_in_conversation(db_conn, user_id: int, conversation_id: int) -> bool:
-    cursor = db_conn.cursor(dictionary=True)
-    try:
-        query = "SELECT 1 FROM conversation_participants WHERE user_id = %s AND conversation_id = %s LIMIT 1"
-        cursor.execute(query, (user_id, conversation_id))
-        return cursor.fetchone() is not None
-    finally:
-        cursor.close()
+    # Hottest membership check (runs on every messaging endpoint), so it uses
+    # the cached prepared cursor rather than a throwaway one.
+    cursor = db_utils.prepared_cursor(db_conn, SQL_CHECK_USER_IN_CONVERSATION)
+    cursor.execute(SQL_CHECK_USER_IN_CONVERSATION, (user_id, conversation_id))
+    return cursor.fetchone() is not None
@@ -1,7 +1,17 @@
 # new_backend/paypal_utils.py
 from . import config
+import functools
+import logging
 import uuid
 
+log = logging.getLogger(__name__)
+
+# Redirect-URL prefixes precomputed at import: config values never change at
+# runtime, so the rstrip + concatenation work happens once instead of on every
+# payment create.
+_RETURN_URL_BASE = f"{config.APP_BASE_URL.rstrip('/')}{config.PAYPAL_RETURN_URL_PATH}?internal_transaction_id="
+_CANCEL_URL_BASE = f"{config.APP_BASE_URL.rstrip('/')}{config.PAYPAL_CANCEL_URL_PATH}?internal_transaction_id="
+
 class MockPayPalClient:
     def __init__(self, client_id, client_secret, mode):
         self.client_id = client_id
@@ -12,7 +22,9 @@ class MockPayPalClient:
         # Simulate payment creation
         # In a real scenario, this would involve API calls to PayPal
         # For now, just return a mock response structure
-        mock_paypal_payment_id = "PAYID-" + str(uuid.uuid4())
+        # .hex skips UUID.__str__'s hyphen formatting - same entropy, one less
+        # allocation on the payment-create path
+        mock_paypal_payment_id = "PAYID-" + uuid.uuid4().hex
         approval_url = None
         # Simplified search for internal_transaction_id in the return_url
         # In a real scenario, PayPal's response structure is more complex.
@@ -36,7 +48,7 @@ class MockPayPalClient:
 
     def payment_execute(self, payment_id: str, payer_id: str):
         # Simulate payment execution
-        mock_paypal_transaction_id = "SALE-" + str(uuid.uuid4())
+        mock_paypal_transaction_id = "SALE-" + uuid.uuid4().hex
         return {
             "id": payment_id,
             "state": "approved", # Or "completed"
@@ -49,18 +61,16 @@ class MockPayPalClient:
         return {"id": payment_id, "state": "created"}, True
 
 
-_paypal_client = None
-
+# lru_cache makes the singleton thread-safe: the old check-then-set on a
+# module global could construct two clients under threaded workers.
+@functools.lru_cache(maxsize=1)
 def get_paypal_client():
-    global _paypal_client
-    if _paypal_client is None:
-        # In a real app, use PayPalSDK or similar
-        _paypal_client = MockPayPalClient(
-            client_id=config.PAYPAL_CLIENT_ID,
-            client_secret=config.PAYPAL_CLIENT_SECRET,
-            mode=config.PAYPAL_MODE
-        )
-    return _paypal_client
+    # In a real app, use PayPalSDK or similar
+    return MockPayPalClient(
+        client_id=config.PAYPAL_CLIENT_ID,
+        client_secret=config.PAYPAL_CLIENT_SECRET,
+        mode=config.PAYPAL_MODE
+    )
 
 def create_paypal_payment(client: MockPayPalClient, amount_str: str, currency: str, return_url: str, cancel_url: str, description: str, internal_transaction_id: str):
     # The return_url and cancel_url passed here are the base paths from config.
@@ -74,8 +84,8 @@ def create_paypal_payment(client: MockPayPalClient, amount_str: str, currency: s
     # Example: "http://localhost:8000/payment/success?internal_transaction_id=123"
     # The task description for config has PAYPAL_RETURN_URL_PATH. So we need to combine.
     
-    full_return_url = f"{config.APP_BASE_URL.rstrip('/')}{config.PAYPAL_RETURN_URL_PATH}?internal_transaction_id={internal_transaction_id}"
-    full_cancel_url = f"{config.APP_BASE_URL.rstrip('/')}{config.PAYPAL_CANCEL_URL_PATH}?internal_transaction_id={internal_transaction_id}"
+    full_return_url = _RETURN_URL_BASE + internal_transaction_id
+    full_cancel_url = _CANCEL_URL_BASE + internal_transaction_id
 
     payment_data = {
         "intent": "sale",
@@ -108,6 +118,6 @@ def execute_paypal_payment_simulation(client: MockPayPalClient, payment_id: str,
             sale_id = response["transactions"][0]["related_resources"][0]["sale"]["id"]
             return sale_id, "completed" # Return PayPal's SALE-xxx and our 'completed' status
         except (IndexError, KeyError) as e:
-            print(f"Error parsing PayPal execution response: {e}")
+            log.exception("Unexpected PayPal execution response shape")
             return None, "failed" # Or some other status indicating parsing issue
     return None, "failed"
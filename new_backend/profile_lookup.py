@@ -0,0 +1,52 @@
+# new_backend/profile_lookup.py
+# Small in-process TTL cache for a user's (family_profile_id, caregiver_profile_id) pair.
+# These mappings are read on hot paths (match creation, review permission checks)
+# but only change when a profile row is created, so a short TTL plus explicit
+# invalidation on profile updates is enough. Plain dict + lock instead of a
+# cachetools dependency to keep requirements.txt as-is.
+import time
+import threading
+
+from . import db_utils
+
+# Hoisted so the per-connection prepared-statement cache (keyed by SQL text)
+# reuses the server-side plan on every cache miss.
+SQL_PROFILE_IDS_BY_USER = (
+    "SELECT (SELECT id FROM family_profiles WHERE user_id = %s), "
+    "(SELECT id FROM caregiver_profiles WHERE user_id = %s)"
+)
+
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 10000
+
+_profile_cache = {} # user_id -> (expires_at, (family_profile_id, caregiver_profile_id))
+_cache_lock = threading.Lock()
+
+def get_profile_ids(db_conn, user_id: int):
+    """
+    Returns (family_profile_id, caregiver_profile_id) for user_id; either element
+    is None when the user has no profile of that kind. Cached for CACHE_TTL_SECONDS.
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _profile_cache.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    # Both lookups in one round-trip via scalar subqueries, on a cached
+    # prepared cursor (this is the hottest statement on cache misses).
+    cursor = db_utils.prepared_cursor(db_conn, SQL_PROFILE_IDS_BY_USER, dictionary=False)
+    cursor.execute(SQL_PROFILE_IDS_BY_USER, (user_id, user_id))
+    row = cursor.fetchone()
+    profile_ids = (row[0], row[1]) if row else (None, None)
+
+    with _cache_lock:
+        if len(_profile_cache) >= CACHE_MAX_ENTRIES:
+            _profile_cache.clear() # crude eviction, but bounded; hot entries repopulate on demand
+        _profile_cache[user_id] = (now + CACHE_TTL_SECONDS, profile_ids)
+    return profile_ids
+
+def invalidate(user_id: int):
+    """Drop the cached pair for user_id (call after creating/updating a profile)."""
+    with _cache_lock:
+        _profile_cache.pop(user_id, None)
@@ -1,52 +1,134 @@
 # new_backend/profile_queries.py
 # Note: This code is adapted from the provided snippet to match the existing schema.sql
 
+import threading
+import time
+
+from . import query_cache
+from . import user_queries
+
+# Public profile pages are high-read/low-write, so the joined rows are kept in
+# a process-wide TTL cache (same stdlib dict + lock approach as profile_lookup;
+# no cachetools/Redis dependency for a single-process deployment). Entries are
+# dropped on update_user_profile, so the TTL only bounds staleness from writes
+# made outside this process. Cached rows are shared - treat them as read-only.
+PUBLIC_PROFILE_TTL_SECONDS = 300
+PUBLIC_PROFILE_MAX_ENTRIES = 10000
+
+_public_profile_cache = {} # (role, user_id) -> (expires_at, row dict or None)
+_public_profile_lock = threading.Lock()
+
+def _public_profile_cached(role, user_id):
+    now = time.monotonic()
+    with _public_profile_lock:
+        entry = _public_profile_cache.get((role, user_id))
+        if entry and entry[0] > now:
+            return entry
+    return None
+
+def _public_profile_store(role, user_id, row):
+    with _public_profile_lock:
+        if len(_public_profile_cache) >= PUBLIC_PROFILE_MAX_ENTRIES:
+            _public_profile_cache.clear() # crude eviction, but bounded; hot profiles repopulate
+        _public_profile_cache[(role, user_id)] = (time.monotonic() + PUBLIC_PROFILE_TTL_SECONDS, row)
+
+def invalidate_public_profile(user_id):
+    """Drop cached public rows for user_id (call after a profile write)."""
+    with _public_profile_lock:
+        _public_profile_cache.pop(('caregiver', user_id), None)
+        _public_profile_cache.pop(('family', user_id), None)
+
+# Role-specific columns of get_user_profile_by_id, used to strip the
+# non-matching role's all-NULL columns from the joined row below.
+_CAREGIVER_PROFILE_KEYS = (
+    'hourly_rate_cents', 'years_of_experience', 'skills_description', 'certifications',
+    'work_schedule_preferences', 'availability_status', 'id_verified',
+    'background_check_status', 'languages_spoken',
+)
+_FAMILY_PROFILE_KEYS = (
+    'number_of_children', 'children_ages', 'specific_needs', 'location_preferences',
+    'preferred_care_type',
+)
+
+@query_cache.request_cached
 def get_user_profile_by_id(db_conn, user_id):
     cursor = db_conn.cursor(dictionary=True)
     try:
-        # First, get the user's basic info and role (user_type in DB)
+        # One round-trip instead of users SELECT + role-specific SELECT: both
+        # profile tables are LEFT JOINed with the join gated on user_type, so
+        # only the matching role's columns come back non-NULL.
         # Using 'state' instead of 'region', 'profile_picture' instead of 'profile_picture_url'
         # Aliasing user_type as role for consistency in the returned dict
         cursor.execute("""
-            SELECT id, username, email, user_type as role, first_name, last_name, 
-                   phone_number, address, city, state, zip_code, country, profile_picture, 
-                   bio as user_bio, created_at, updated_at 
-            FROM users 
-            WHERE id = %s
+            SELECT u.id, u.username, u.email, u.user_type as role, u.first_name, u.last_name,
+                   u.phone_number, u.address, u.city, u.state, u.zip_code, u.country, u.profile_picture,
+                   u.bio as user_bio, u.created_at, u.updated_at,
+                   cp.user_id AS _has_cg_profile, fp.user_id AS _has_fam_profile,
+                   CAST(ROUND(cp.hourly_rate * 100) AS SIGNED) AS hourly_rate_cents, -- int cents, matching CaregiverProfileResponse
+                   cp.years_of_experience, cp.skills_description, cp.certifications,
+                   cp.work_schedule_preferences, cp.availability_status, cp.id_verified,
+                   cp.background_check_status, cp.languages_spoken,
+                   fp.number_of_children, fp.children_ages, fp.specific_needs, fp.location_preferences,
+                   fp.preferred_care_type
+            FROM users u
+            LEFT JOIN caregiver_profiles cp ON cp.user_id = u.id AND u.user_type = 'caregiver'
+            LEFT JOIN family_profiles fp ON fp.user_id = u.id AND u.user_type = 'family'
+            WHERE u.id = %s
         """, (user_id,))
         user_data = cursor.fetchone()
         if not user_data:
             return None
 
-        # Based on role, fetch role-specific profile
-        if user_data['role'] == 'caregiver':
-            # Adapted fields for caregiver_profiles
-            cursor.execute("""
-                SELECT hourly_rate, years_of_experience, skills_description, certifications, 
-                       work_schedule_preferences, availability_status, id_verified, 
-                       background_check_status, languages_spoken
-                FROM caregiver_profiles 
-                WHERE user_id = %s
-            """, (user_id,))
-            caregiver_data = cursor.fetchone()
-            if caregiver_data:
-                user_data.update(caregiver_data)
-        elif user_data['role'] == 'family':
-            # Adapted fields for family_profiles
-            cursor.execute("""
-                SELECT number_of_children, children_ages, specific_needs, location_preferences, 
-                       preferred_care_type
-                FROM family_profiles 
-                WHERE user_id = %s
-            """, (user_id,))
-            family_data = cursor.fetchone()
-            if family_data:
-                user_data.update(family_data)
-        
+        # Match the old two-step dict shape: role-specific keys only appear
+        # when that role's profile row actually exists.
+        has_cg_profile = user_data.pop('_has_cg_profile') is not None
+        has_fam_profile = user_data.pop('_has_fam_profile') is not None
+        if not has_cg_profile:
+            for key in _CAREGIVER_PROFILE_KEYS:
+                user_data.pop(key, None)
+        if not has_fam_profile:
+            for key in _FAMILY_PROFILE_KEYS:
+                user_data.pop(key, None)
+
         return user_data
     finally:
         cursor.close()
 
+# Statement text per distinct "update shape" (set of fields being written).
+# Fields are iterated in sorted order so the same shape always produces the
+# same SQL text - assembled once per shape instead of per request, and
+# byte-identical text lets the server reuse its statement cache too.
+_users_update_stmt_cache = {} # frozenset(fields) -> SQL
+_upsert_stmt_cache = {} # (table, frozenset(fields)) -> SQL
+
+def _users_update_statement(field_keys):
+    cache_key = frozenset(field_keys)
+    stmt = _users_update_stmt_cache.get(cache_key)
+    if stmt is None:
+        set_clauses = ", ".join(f"{field} = %s" for field in sorted(cache_key))
+        stmt = f"UPDATE users SET {set_clauses}, updated_at = NOW() WHERE id = %s"
+        _users_update_stmt_cache[cache_key] = stmt
+    return stmt
+
+def _upsert_profile_statement(table, user_id, updates: dict):
+    # user_id is UNIQUE in both profile tables, so one INSERT ... ON DUPLICATE
+    # KEY UPDATE replaces the old probe SELECT + INSERT-or-UPDATE pair - one
+    # round-trip instead of two, with no race between probe and write.
+    cache_key = (table, frozenset(updates.keys()))
+    query = _upsert_stmt_cache.get(cache_key)
+    if query is None:
+        fields = sorted(updates.keys())
+        placeholders = ", ".join(["%s"] * len(fields))
+        assignments = ", ".join(f"{field} = VALUES({field})" for field in fields)
+        query = (
+            f"INSERT INTO {table} (user_id, {', '.join(fields)}) "
+            f"VALUES (%s, {placeholders}) "
+            f"ON DUPLICATE KEY UPDATE {assignments}, updated_at = NOW()"
+        )
+        _upsert_stmt_cache[cache_key] = query
+    # Single tuple build (no intermediate list + copy); sorted order matches the statement
+    return query, (user_id, *(updates[field] for field in sorted(updates.keys())))
+
 def update_user_profile(db_conn, user_id, role, profile_data: dict):
     cursor = db_conn.cursor()
     try:
@@ -56,74 +138,44 @@ def update_user_profile(db_conn, user_id, role, profile_data: dict):
         common_fields = ['phone_number', 'address', 'city', 'state', 'zip_code', 'country', 
                          'profile_picture', 'first_name', 'last_name', 'bio'] 
         common_updates = {k: v for k, v in profile_data.items() if k in common_fields and v is not None}
-        
+
+        statements = [] # (sql, params) pairs to ship to the server
         if common_updates:
-            set_clauses = ", ".join([f"{key} = %s" for key in common_updates.keys()])
-            values = list(common_updates.values())
-            values.append(user_id)
-            cursor.execute(f"UPDATE users SET {set_clauses}, updated_at = NOW() WHERE id = %s", tuple(values))
+            # Values in sorted key order, matching the cached statement's
+            # clauses; built as one tuple without an intermediate list
+            params = (*(common_updates[key] for key in sorted(common_updates.keys())), user_id)
+            statements.append((_users_update_statement(common_updates.keys()), params))
 
         if role == 'caregiver':
             # Adapted fields for 'caregiver_profiles'
-            cg_fields = ['hourly_rate', 'years_of_experience', 'skills_description', 
+            cg_fields = ['hourly_rate', 'years_of_experience', 'skills_description',
                          'certifications', 'work_schedule_preferences', 'availability_status',
                          'id_verified', 'background_check_status', 'languages_spoken']
             cg_updates = {k: v for k, v in profile_data.items() if k in cg_fields and v is not None}
-            
+
             if cg_updates:
-                cursor.execute("SELECT 1 FROM caregiver_profiles WHERE user_id = %s", (user_id,))
-                if not cursor.fetchone():
-                    # Insert if not exists: ensure all required fields for caregiver_profiles are handled
-                    # For simplicity, assuming all fields in cg_updates are sufficient for an insert.
-                    # A more robust version would check for NOT NULL constraints from schema.sql.
-                    # user_id is required. Other fields might have defaults or be nullable.
-                    insert_fields = [k for k in cg_updates.keys()]
-                    insert_placeholders = ", ".join(["%s"] * len(insert_fields))
-                    insert_values = [cg_updates[k] for k in insert_fields]
-                    if insert_fields: # Only proceed if there are fields to insert
-                        query = f"INSERT INTO caregiver_profiles (user_id, {', '.join(insert_fields)}) VALUES (%s, {insert_placeholders})"
-                        cursor.execute(query, tuple([user_id] + insert_values))
-                    else: # If cg_updates was empty or only contained user_id (which is not in cg_fields)
-                        # This case might mean only creating an empty profile link if that's desired.
-                        # For now, if no specific caregiver fields, we could insert just user_id or skip.
-                        # Let's assume if cg_updates is populated, we attempt an insert.
-                        # If only user_id is to be inserted (e.g. to create the link)
-                        cursor.execute("INSERT INTO caregiver_profiles (user_id) VALUES (%s)", (user_id,))
-
-                else:
-                    if cg_updates: # Only proceed if there are fields to update
-                        set_clauses = ", ".join([f"{key} = %s" for key in cg_updates.keys()])
-                        values = list(cg_updates.values())
-                        values.append(user_id)
-                        query = f"UPDATE caregiver_profiles SET {set_clauses}, updated_at = NOW() WHERE user_id = %s"
-                        cursor.execute(query, tuple(values))
+                statements.append(_upsert_profile_statement('caregiver_profiles', user_id, cg_updates))
 
         elif role == 'family':
             # Adapted fields for 'family_profiles'
-            fam_fields = ['number_of_children', 'children_ages', 'specific_needs', 
+            fam_fields = ['number_of_children', 'children_ages', 'specific_needs',
                           'location_preferences', 'preferred_care_type']
             fam_updates = {k: v for k, v in profile_data.items() if k in fam_fields and v is not None}
 
             if fam_updates:
-                cursor.execute("SELECT 1 FROM family_profiles WHERE user_id = %s", (user_id,))
-                if not cursor.fetchone():
-                    insert_fields = [k for k in fam_updates.keys()]
-                    insert_placeholders = ", ".join(["%s"] * len(insert_fields))
-                    insert_values = [fam_updates[k] for k in insert_fields]
-                    if insert_fields:
-                        query = f"INSERT INTO family_profiles (user_id, {', '.join(insert_fields)}) VALUES (%s, {insert_placeholders})"
-                        cursor.execute(query, tuple([user_id] + insert_values))
-                    else:
-                         cursor.execute("INSERT INTO family_profiles (user_id) VALUES (%s)", (user_id,))
-                else:
-                    if fam_updates:
-                        set_clauses = ", ".join([f"{key} = %s" for key in fam_updates.keys()])
-                        values = list(fam_updates.values())
-                        values.append(user_id)
-                        query = f"UPDATE family_profiles SET {set_clauses}, updated_at = NOW() WHERE user_id = %s"
-                        cursor.execute(query, tuple(values))
-            
+                statements.append(_upsert_profile_statement('family_profiles', user_id, fam_updates))
+
+        # Sequential executes under the single commit below - the one
+        # commit/fsync is where the saving is. (execute(..., multi=True) would
+        # not help anyway: the connector splits the statements client-side and
+        # sends them one by one, and the option is removed in 9.x drivers.)
+        for statement in statements:
+            cursor.execute(*statement)
+
         db_conn.commit()
+        query_cache.clear() # memoized get_user_profile_by_id results are now stale
+        invalidate_public_profile(user_id) # and so are cached public rows
+        user_queries.invalidate_user(user_id) # cached by-id row carries names/profile ids
         return True
     except Exception as e:
         db_conn.rollback()
@@ -132,6 +184,10 @@ def update_user_profile(db_conn, user_id, role, profile_data: dict):
         cursor.close()
 
 def get_caregiver_public_profile(db_conn, caregiver_user_id):
+    cached = _public_profile_cached('caregiver', caregiver_user_id)
+    if cached:
+        return cached[1]
+
     cursor = db_conn.cursor(dictionary=True)
     try:
         # Adapted to schema.sql: u.user_type, u.state, u.profile_picture, u.bio
@@ -140,19 +196,28 @@ def get_caregiver_public_profile(db_conn, caregiver_user_id):
         SELECT u.id, u.username, u.email, u.user_type as role, u.first_name, u.last_name, 
                u.city, u.state, u.country, u.profile_picture, u.bio as user_bio, 
                u.created_at AS user_created_at,
-               cp.hourly_rate, cp.years_of_experience, cp.skills_description, 
+               UNIX_TIMESTAMP(GREATEST(u.updated_at, cp.updated_at)) AS profile_version,
+               CAST(ROUND(cp.hourly_rate * 100) AS SIGNED) AS hourly_rate_cents,
+               cp.years_of_experience, cp.skills_description,
                cp.certifications, cp.work_schedule_preferences, cp.availability_status,
-               cp.id_verified, cp.background_check_status, cp.languages_spoken
+               cp.id_verified, cp.background_check_status, cp.languages_spoken,
+               cp.avg_rating, cp.review_count
         FROM users u
         JOIN caregiver_profiles cp ON u.id = cp.user_id
         WHERE u.id = %s AND u.user_type = 'caregiver' AND u.is_active = TRUE
         """
         cursor.execute(query, (caregiver_user_id,))
-        return cursor.fetchone()
+        row = cursor.fetchone()
+        _public_profile_store('caregiver', caregiver_user_id, row)
+        return row
     finally:
         cursor.close()
 
 def get_family_public_profile(db_conn, family_user_id):
+    cached = _public_profile_cached('family', family_user_id)
+    if cached:
+        return cached[1]
+
     cursor = db_conn.cursor(dictionary=True)
     try:
         # Adapted to schema.sql: u.user_type, u.state, u.profile_picture, u.bio
@@ -161,6 +226,7 @@ def get_family_public_profile(db_conn, family_user_id):
         SELECT u.id, u.username, u.email, u.user_type as role, u.first_name, u.last_name,
                u.city, u.state, u.country, u.profile_picture, u.bio as user_bio,
                u.created_at AS user_created_at,
+               UNIX_TIMESTAMP(GREATEST(u.updated_at, fp.updated_at)) AS profile_version,
                fp.number_of_children, fp.children_ages, fp.specific_needs,
                fp.location_preferences, fp.preferred_care_type
         FROM users u
@@ -168,6 +234,8 @@ def get_family_public_profile(db_conn, family_user_id):
         WHERE u.id = %s AND u.user_type = 'family' AND u.is_active = TRUE
         """
         cursor.execute(query, (family_user_id,))
-        return cursor.fetchone()
+        row = cursor.fetchone()
+        _public_profile_store('family', family_user_id, row)
+        return row
     finally:
         cursor.close()
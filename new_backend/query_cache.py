@@ -0,0 +1,63 @@
+# new_backend/query_cache.py
+# Per-request memoization for small lookup queries. Within one HTTP action the
+# same (user_id, role) profile lookups can run several times (dependency
+# resolution + handler + permission checks); caching them for the lifetime of
+# the request removes the duplicate SELECTs without any staleness window
+# beyond the request itself. A contextvars.ContextVar scopes the dict to the
+# request even though handlers run in FastAPI's threadpool.
+import contextvars
+import functools
+
+_request_cache = contextvars.ContextVar("request_query_cache", default=None)
+
+def reset():
+    """Give the current request a fresh, empty cache (called by middleware)."""
+    _request_cache.set({})
+
+def clear():
+    """Drop every memoized result; call after a write that could change them."""
+    cache = _request_cache.get()
+    if cache is not None:
+        cache.clear()
+
+def seed(fn, args, value):
+    """
+    Pre-populate the memoized result of a request_cached function, so a later
+    call with the same args (db_conn excluded) is served from the cache. Used
+    by prefetch helpers that already hold the data from a wider JOIN. No-op
+    outside a request.
+    """
+    cache = _request_cache.get()
+    if cache is not None:
+        cache[(fn.__module__, fn.__qualname__, tuple(args), ())] = value
+
+def get(fn, args, default=None):
+    """
+    Fetch the memoized result stored for fn(args) (by request_cached or
+    seed), or `default` when absent or outside a request. Counterpart to
+    seed for callers that manage their own compute step.
+    """
+    cache = _request_cache.get()
+    if cache is None:
+        return default
+    return cache.get((fn.__module__, fn.__qualname__, tuple(args), ()), default)
+
+def request_cached(fn):
+    """
+    Memoize a query function for the duration of one request. The first
+    positional argument is assumed to be db_conn and is excluded from the
+    cache key. Outside a request (scripts, startup) the cache is absent and
+    the function runs normally.
+    """
+    @functools.wraps(fn)
+    def wrapper(db_conn, *args, **kwargs):
+        cache = _request_cache.get()
+        if cache is None:
+            return fn(db_conn, *args, **kwargs)
+        key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        if key in cache:
+            return cache[key]
+        result = fn(db_conn, *args, **kwargs)
+        cache[key] = result
+        return result
+    return wrapper
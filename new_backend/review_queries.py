@@ -1,20 +1,92 @@
 # new_backend/review_queries.py
 import datetime
 
-# This helper remains useful for checks involving profile tables (like match_requests)
+from . import db_utils
+from . import profile_lookup
+from . import query_cache
+
+# Constant-SQL hot statements, run through db_utils.prepared_cursor so the
+# server keeps the parsed plan per connection (cache is keyed by SQL text).
+SQL_RAW_REVIEW_BY_ID = "SELECT * FROM reviews WHERE id = %s"
+SQL_UPDATE_REVIEW = "UPDATE reviews SET rating = %s, comment = %s, updated_at = NOW() WHERE id = %s"
+SQL_DELETE_REVIEW = "DELETE FROM reviews WHERE id = %s"
+
+# Raw review plus both parties' profile ids in one round-trip, used by
+# prefetch_review_context to seed the per-request cache.
+SQL_REVIEW_CONTEXT = """
+SELECT r.*,
+       rfp.id AS _reviewer_family_profile_id,
+       rcp.id AS _reviewer_caregiver_profile_id,
+       efp.id AS _reviewee_family_profile_id,
+       ecp.id AS _reviewee_caregiver_profile_id
+FROM reviews r
+LEFT JOIN family_profiles rfp ON rfp.user_id = r.reviewer_id
+LEFT JOIN caregiver_profiles rcp ON rcp.user_id = r.reviewer_id
+LEFT JOIN family_profiles efp ON efp.user_id = r.reviewee_id
+LEFT JOIN caregiver_profiles ecp ON ecp.user_id = r.reviewee_id
+WHERE r.id = %s
+"""
+
+# --- Denormalized caregiver rating aggregates ---
+# caregiver_profiles.avg_rating / review_count are maintained inside the same
+# transaction as each review write, so profile views read two columns instead
+# of aggregating the reviews table. MySQL evaluates SET clauses left to right
+# with already-updated values, so avg_rating is always computed before
+# review_count changes.
+SQL_RATING_ADD = """
+UPDATE caregiver_profiles
+SET avg_rating = (COALESCE(avg_rating, 0) * review_count + %s) / (review_count + 1),
+    review_count = review_count + 1
+WHERE user_id = %s
+"""
+SQL_RATING_ADJUST = """
+UPDATE caregiver_profiles
+SET avg_rating = avg_rating + (%s - %s) / review_count
+WHERE user_id = %s AND review_count > 0
+"""
+SQL_RATING_REMOVE = """
+UPDATE caregiver_profiles
+SET avg_rating = CASE WHEN review_count <= 1 THEN NULL
+                      ELSE (avg_rating * review_count - %s) / (review_count - 1) END,
+    review_count = GREATEST(review_count - 1, 0)
+WHERE user_id = %s
+"""
+
+# This helper remains useful for checks involving profile tables (like match_requests).
+# Lookups go through the shared TTL cache, so repeated checks for the same user
+# skip the profile query entirely; request_cached additionally dedups calls
+# within one request.
+@query_cache.request_cached
 def get_profile_id_from_user_id(db_conn, user_id: int, role: str) -> int | None:
-    cursor = db_conn.cursor(dictionary=True)
-    try:
-        if role == 'caregiver':
-            cursor.execute("SELECT id FROM caregiver_profiles WHERE user_id = %s", (user_id,))
-        elif role == 'family':
-            cursor.execute("SELECT id FROM family_profiles WHERE user_id = %s", (user_id,))
-        else:
-            return None
-        profile = cursor.fetchone()
-        return profile['id'] if profile else None
-    finally:
-        cursor.close()
+    if role not in ('caregiver', 'family'):
+        return None
+    family_profile_id, caregiver_profile_id = profile_lookup.get_profile_ids(db_conn, user_id)
+    return caregiver_profile_id if role == 'caregiver' else family_profile_id
+
+def prefetch_review_context(db_conn, review_id: int):
+    """
+    Fetch the raw review and the reviewer's/reviewee's profile ids in one JOIN,
+    seeding the per-request cache so the permission check's later
+    get_raw_review_by_id / get_profile_id_from_user_id calls hit memory instead
+    of running their own SELECTs. Returns the raw review row, or None.
+    """
+    cursor = db_utils.prepared_cursor(db_conn, SQL_REVIEW_CONTEXT)
+    cursor.execute(SQL_REVIEW_CONTEXT, (review_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    reviewer_fam = row.pop('_reviewer_family_profile_id')
+    reviewer_cg = row.pop('_reviewer_caregiver_profile_id')
+    reviewee_fam = row.pop('_reviewee_family_profile_id')
+    reviewee_cg = row.pop('_reviewee_caregiver_profile_id')
+
+    query_cache.seed(get_raw_review_by_id, (review_id,), row)
+    query_cache.seed(get_profile_id_from_user_id, (row['reviewer_id'], 'family'), reviewer_fam)
+    query_cache.seed(get_profile_id_from_user_id, (row['reviewer_id'], 'caregiver'), reviewer_cg)
+    query_cache.seed(get_profile_id_from_user_id, (row['reviewee_id'], 'family'), reviewee_fam)
+    query_cache.seed(get_profile_id_from_user_id, (row['reviewee_id'], 'caregiver'), reviewee_cg)
+    return row
 
 def check_if_family_can_review_caregiver(db_conn, family_profile_id: int, caregiver_profile_id: int, match_request_id_optional: int = None) -> bool:
     """
@@ -53,8 +125,13 @@ def create_review(db_conn, reviewer_user_id: int, reviewee_user_id: int, rating:
         VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         cursor.execute(query, (reviewer_user_id, reviewee_user_id, rating, comment, review_type, match_request_id))
+        review_id = cursor.lastrowid # before the aggregate UPDATE resets it
+        if review_type == 'family_to_caregiver':
+            # Keep the caregiver's denormalized aggregates in the same transaction
+            cursor.execute(SQL_RATING_ADD, (rating, reviewee_user_id))
         db_conn.commit()
-        return cursor.lastrowid
+        query_cache.clear() # memoized review/profile lookups may now be stale
+        return review_id
     except Exception as e: 
         db_conn.rollback()
         raise e
@@ -91,46 +168,51 @@ def get_review_details_by_id(db_conn, review_id: int):
     finally:
         cursor.close()
             
+@query_cache.request_cached
 def get_raw_review_by_id(db_conn, review_id: int):
-    cursor = db_conn.cursor(dictionary=True)
-    try:
-        # Returns raw columns including reviewer_id, reviewee_id, review_type
-        cursor.execute("SELECT * FROM reviews WHERE id = %s", (review_id,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
+    # Returns raw columns including reviewer_id, reviewee_id, review_type.
+    # Cached prepared cursor: runs before every review update/delete.
+    cursor = db_utils.prepared_cursor(db_conn, SQL_RAW_REVIEW_BY_ID)
+    cursor.execute(SQL_RAW_REVIEW_BY_ID, (review_id,))
+    return cursor.fetchone()
 
 # Adapted for reviewee_user_id (caregiver's user_id)
-def get_reviews_for_caregiver(db_conn, caregiver_user_id: int, page: int = 1, page_size: int = 10):
+def get_reviews_for_caregiver(db_conn, caregiver_user_id: int, after=None, limit: int = 10):
+    """
+    One keyset page of a caregiver's reviews. 'after' is the (created_at, id)
+    ordering tuple of the last row of the previous page; limit+1 rows are
+    returned so the caller can tell whether a further page exists. Seeking on
+    (created_at, id) keeps deep pages O(limit), unlike LIMIT/OFFSET which
+    scans and discards offset rows per page.
+    """
     cursor = db_conn.cursor(dictionary=True)
     try:
-        # Filters by reviewee_id and review_type
-        count_query = """
-        SELECT COUNT(id) as total_count FROM reviews 
-        WHERE reviewee_id = %s AND review_type = 'family_to_caregiver'
-        """
-        cursor.execute(count_query, (caregiver_user_id,))
-        total_count_result = cursor.fetchone()
-        total_count = total_count_result['total_count'] if total_count_result else 0
-
-        offset = (page - 1) * page_size
-        query_ids = """
-        SELECT id FROM reviews 
-        WHERE reviewee_id = %s AND review_type = 'family_to_caregiver' 
-        ORDER BY created_at DESC LIMIT %s OFFSET %s
+        # One joined query for the whole page - same projection as
+        # get_review_details_by_id, which the old version called in a Python
+        # loop per review id (page_size+1 round-trips for one page).
+        query = """
+        SELECT
+            r.id, r.rating, r.comment, r.created_at, r.updated_at, r.review_type, r.match_request_id,
+            r.reviewee_id AS caregiver_user_id, -- Assuming reviewee is caregiver for 'family_to_caregiver'
+            cp.id AS caregiver_profile_id,      -- Fetched caregiver_profile_id
+            r.reviewer_id AS family_user_id,    -- family user who wrote the review
+            fp.id AS family_profile_id,         -- Fetched family_profile_id
+            fam_user.username AS family_username,
+            fam_user.profile_picture AS family_profile_picture_url
+        FROM reviews r
+        JOIN users fam_user ON r.reviewer_id = fam_user.id
+        LEFT JOIN family_profiles fp ON r.reviewer_id = fp.user_id  -- To get family_profile_id
+        LEFT JOIN caregiver_profiles cp ON r.reviewee_id = cp.user_id -- To get caregiver_profile_id
+        WHERE r.reviewee_id = %s AND r.review_type = 'family_to_caregiver'
         """
-        cursor.execute(query_ids, (caregiver_user_id, page_size, offset))
-        review_ids_data = cursor.fetchall()
-        
-        detailed_reviews = []
-        if review_ids_data:
-            for row in review_ids_data:
-                # get_review_details_by_id should be able to handle any review_id correctly
-                review_detail = get_review_details_by_id(db_conn, row['id'])
-                if review_detail:
-                    detailed_reviews.append(review_detail)
-        
-        return detailed_reviews, total_count
+        params = [caregiver_user_id]
+        if after is not None:
+            query += " AND (r.created_at, r.id) < (%s, %s)"
+            params.extend(after)
+        query += " ORDER BY r.created_at DESC, r.id DESC LIMIT %s"
+        params.append(limit + 1)
+        cursor.execute(query, tuple(params))
+        return cursor.fetchall()
     finally:
         cursor.close()
 
@@ -155,27 +237,49 @@ def get_review_by_family_for_caregiver(db_conn, family_user_id: int, caregiver_u
         cursor.close()
 
 def update_review(db_conn, review_id: int, rating: int, comment: str = None):
-    cursor = db_conn.cursor()
+    # Old row needed for the aggregate delta; usually already memoized by the
+    # endpoint's permission check.
+    old_review = get_raw_review_by_id(db_conn, review_id)
     try:
-        query = "UPDATE reviews SET rating = %s, comment = %s, updated_at = NOW() WHERE id = %s"
-        cursor.execute(query, (rating, comment, review_id))
+        cursor = db_utils.prepared_cursor(db_conn, SQL_UPDATE_REVIEW, dictionary=False)
+        cursor.execute(SQL_UPDATE_REVIEW, (rating, comment, review_id))
+        if cursor.rowcount == 0:
+            # Unknown id or values already identical: nothing changed, so skip
+            # the commit and its redo-log flush.
+            db_conn.rollback()
+            return False
+        if (old_review and old_review['review_type'] == 'family_to_caregiver'
+                and old_review['rating'] != rating):
+            adj_cursor = db_conn.cursor()
+            try:
+                adj_cursor.execute(SQL_RATING_ADJUST, (rating, old_review['rating'], old_review['reviewee_id']))
+            finally:
+                adj_cursor.close()
         db_conn.commit()
-        return cursor.rowcount > 0
+        query_cache.clear() # get_raw_review_by_id may be memoized for this id
+        return True
     except Exception as e:
         db_conn.rollback()
         raise e
-    finally:
-        cursor.close()
 
 def delete_review(db_conn, review_id: int):
-    cursor = db_conn.cursor()
+    # Old row needed to back its rating out of the caregiver's aggregates
+    old_review = get_raw_review_by_id(db_conn, review_id)
     try:
-        query = "DELETE FROM reviews WHERE id = %s"
-        cursor.execute(query, (review_id,))
+        cursor = db_utils.prepared_cursor(db_conn, SQL_DELETE_REVIEW, dictionary=False)
+        cursor.execute(SQL_DELETE_REVIEW, (review_id,))
+        if cursor.rowcount == 0:
+            db_conn.rollback() # nothing deleted, nothing to flush
+            return False
+        if old_review and old_review['review_type'] == 'family_to_caregiver':
+            adj_cursor = db_conn.cursor()
+            try:
+                adj_cursor.execute(SQL_RATING_REMOVE, (old_review['rating'], old_review['reviewee_id']))
+            finally:
+                adj_cursor.close()
         db_conn.commit()
-        return cursor.rowcount > 0
+        query_cache.clear() # get_raw_review_by_id may be memoized for this id
+        return True
     except Exception as e:
         db_conn.rollback()
         raise e
-    finally:
-        cursor.close()
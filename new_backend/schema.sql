@@ -11,7 +11,7 @@ CREATE TABLE users (
     is_staff BOOLEAN DEFAULT FALSE,
     is_active BOOLEAN DEFAULT TRUE,
     date_joined DATETIME DEFAULT CURRENT_TIMESTAMP,
-    last_login DATETIME NULL,
+    last_login DATETIME NULL, -- legacy; new logins are tracked in user_login_events
     -- UserProfile fields
     phone_number VARCHAR(20) UNIQUE,
     address TEXT,
@@ -26,6 +26,17 @@ CREATE TABLE users (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
 
+-- Login bookkeeping, split out of users so that every login dirties a page of
+-- this tiny two-column table instead of the wide users rows: the users
+-- clustered index stays read-mostly and packs tighter in the buffer pool.
+-- Written by the coalescing flusher in user_queries; nothing joins it on the
+-- hot path.
+CREATE TABLE user_login_events (
+    user_id INT PRIMARY KEY,
+    last_login DATETIME NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 -- Caregiver Profiles table
 CREATE TABLE caregiver_profiles (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -39,6 +50,8 @@ CREATE TABLE caregiver_profiles (
     id_verified BOOLEAN DEFAULT FALSE,
     background_check_status ENUM('not_started', 'pending', 'completed_clear', 'completed_issues') DEFAULT 'not_started',
     languages_spoken VARCHAR(255), -- Comma-separated or JSON array
+    avg_rating DECIMAL(3, 2) DEFAULT NULL, -- Denormalized from reviews; maintained by review_queries
+    review_count INT NOT NULL DEFAULT 0,   -- Denormalized from reviews; maintained by review_queries
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -183,6 +196,34 @@ CREATE INDEX idx_reviews_reviewer_id ON reviews(reviewer_id);
 CREATE INDEX idx_reviews_reviewee_id ON reviews(reviewee_id);
 CREATE INDEX idx_transactions_status ON transactions(transaction_status);
 
+-- Covering indexes for the login/auth lookups in user_queries: the composite
+-- holds every column those SELECTs project (id comes free as the clustered
+-- key pointer), so MySQL answers them from index leaf pages alone instead of
+-- a secondary-index probe plus a clustered-index random read per call.
+-- Worth the extra write amplification only on these two hottest lookups.
+-- first_name/last_name cannot be included: under utf8mb4 the full column set
+-- is ~3332 bytes, past InnoDB's 3072-byte index key limit (error 1071), so
+-- the auth SELECTs project only the columns below to stay index-only.
+CREATE INDEX idx_users_email_cover ON users(email, username, password, user_type, is_active);
+CREATE INDEX idx_users_username_cover ON users(username, email, password, user_type, is_active);
+
+-- Composite indexes for the batched single-query paths:
+-- membership checks and the per-user conversation page, in both directions
+CREATE INDEX idx_convpart_user_conv ON conversation_participants(user_id, conversation_id);
+CREATE INDEX idx_convpart_conv_user ON conversation_participants(conversation_id, user_id);
+-- message pages / last-message-per-conversation window query
+CREATE INDEX idx_messages_conv_sentat ON messages(conversation_id, sent_at DESC);
+-- mark_messages_as_read predicate (conversation_id + is_read + sender_id)
+CREATE INDEX idx_messages_conv_isread_sender ON messages(conversation_id, is_read, sender_id);
+-- duplicate-match check and status-filtered match listings
+CREATE INDEX idx_match_status_fam_cg ON match_requests(request_status, family_profile_id, caregiver_profile_id);
+-- keyset pagination of a caregiver's reviews (seek on created_at, id)
+CREATE INDEX idx_reviews_reviewee_type_created ON reviews(reviewee_id, review_type, created_at, id);
+-- per-user transaction history: each side of the UNION ALL list query is an
+-- index range scan in (created_at, id) order
+CREATE INDEX idx_tx_init_created ON transactions(initiating_user_id, created_at DESC, id);
+CREATE INDEX idx_tx_recv_created ON transactions(receiving_user_id, created_at DESC, id);
+
 -- Note: ENUM values are based on common use cases and Django model choices.
 -- Adjust data types (e.g., TEXT vs VARCHAR, JSON for flexible fields) and constraints as needed.
 -- Consider adding more specific indexes based on query patterns.
@@ -1,6 +1,15 @@
 # new_backend/transaction_queries.py
 import datetime
 
+from . import db_utils
+
+# Constant-SQL status updates run through db_utils.prepared_cursor: the
+# server-side prepared statement is cached per pooled connection, so the
+# parse/plan step is paid once per connection instead of per PayPal callback.
+SQL_UPDATE_TX_ON_SUCCESS = "UPDATE transactions SET transaction_reference_id = %s, transaction_status = %s, updated_at = NOW() WHERE id = %s"
+SQL_UPDATE_TX_STATUS = "UPDATE transactions SET transaction_status = %s, updated_at = NOW() WHERE id = %s"
+SQL_UPDATE_TX_PAYPAL_ID = "UPDATE transactions SET paypal_payment_id = %s, updated_at = NOW() WHERE id = %s"
+
 def create_transaction_record(db_conn, initiating_user_id: int, receiving_user_id: int, 
                               amount: float, currency: str,
                               paypal_payment_id: str = None, # PAYID-XXX from PayPal
@@ -31,12 +40,19 @@ def get_transaction_by_id(db_conn, internal_transaction_id: int): # Fetches our
     try:
         # Join with users table to get initiator/receiver details for TransactionResponse
         # Using schema column names: initiating_user_id, receiving_user_id
+        # The user sub-objects come back as one JSON blob per side (built by
+        # JSON_OBJECT server-side) instead of three flat aliased columns, so
+        # Python parses a single value per user rather than assembling a dict;
+        # NULL when the LEFT JOIN found no row, matching the old init_user_id
+        # presence check.
         query = """
-            SELECT 
-                t.*, 
+            SELECT
+                t.*,
                 t.id as internal_transaction_id, -- ensure 'id' is also aliased if needed by Pydantic from_query_result
-                u_init.id as init_user_id, u_init.username as init_username, u_init.email as init_email,
-                u_recv.id as recv_user_id, u_recv.username as recv_username, u_recv.email as recv_email
+                CASE WHEN u_init.id IS NULL THEN NULL ELSE JSON_OBJECT(
+                    'user_id', u_init.id, 'username', u_init.username, 'email', u_init.email) END AS init_user,
+                CASE WHEN u_recv.id IS NULL THEN NULL ELSE JSON_OBJECT(
+                    'user_id', u_recv.id, 'username', u_recv.username, 'email', u_recv.email) END AS recv_user
             FROM transactions t
             LEFT JOIN users u_init ON t.initiating_user_id = u_init.id
             LEFT JOIN users u_recv ON t.receiving_user_id = u_recv.id
@@ -51,11 +67,14 @@ def get_transaction_by_paypal_payment_id(db_conn, paypal_payment_id: str): # pay
     cursor = db_conn.cursor(dictionary=True)
     try:
         # Using schema column names: initiating_user_id, receiving_user_id
+        # Same JSON_OBJECT user projection as get_transaction_by_id
         query = """
             SELECT t.*,
-                t.id as internal_transaction_id, 
-                u_init.id as init_user_id, u_init.username as init_username, u_init.email as init_email,
-                u_recv.id as recv_user_id, u_recv.username as recv_username, u_recv.email as recv_email
+                t.id as internal_transaction_id,
+                CASE WHEN u_init.id IS NULL THEN NULL ELSE JSON_OBJECT(
+                    'user_id', u_init.id, 'username', u_init.username, 'email', u_init.email) END AS init_user,
+                CASE WHEN u_recv.id IS NULL THEN NULL ELSE JSON_OBJECT(
+                    'user_id', u_recv.id, 'username', u_recv.username, 'email', u_recv.email) END AS recv_user
             FROM transactions t
             LEFT JOIN users u_init ON t.initiating_user_id = u_init.id
             LEFT JOIN users u_recv ON t.receiving_user_id = u_recv.id
@@ -67,71 +86,121 @@ def get_transaction_by_paypal_payment_id(db_conn, paypal_payment_id: str): # pay
         cursor.close()
 
 def update_transaction_on_paypal_success(db_conn, internal_transaction_id: int, paypal_sale_id: str, new_status: str):
-    cursor = db_conn.cursor()
     try:
         # paypal_sale_id (SALE-XXX) is stored in transaction_reference_id
-        query = "UPDATE transactions SET transaction_reference_id = %s, transaction_status = %s, updated_at = NOW() WHERE id = %s"
-        cursor.execute(query, (paypal_sale_id, new_status, internal_transaction_id))
+        cursor = db_utils.prepared_cursor(db_conn, SQL_UPDATE_TX_ON_SUCCESS, dictionary=False)
+        cursor.execute(SQL_UPDATE_TX_ON_SUCCESS, (paypal_sale_id, new_status, internal_transaction_id))
         db_conn.commit()
         return cursor.rowcount > 0
     except Exception as e:
         db_conn.rollback()
         raise e
-    finally:
-        cursor.close()
 
 def update_transaction_status(db_conn, internal_transaction_id: int, new_status: str):
-    cursor = db_conn.cursor()
     try:
-        query = "UPDATE transactions SET transaction_status = %s, updated_at = NOW() WHERE id = %s"
-        cursor.execute(query, (new_status, internal_transaction_id))
+        cursor = db_utils.prepared_cursor(db_conn, SQL_UPDATE_TX_STATUS, dictionary=False)
+        cursor.execute(SQL_UPDATE_TX_STATUS, (new_status, internal_transaction_id))
         db_conn.commit()
         return cursor.rowcount > 0
     except Exception as e:
         db_conn.rollback()
         raise e
-    finally:
-        cursor.close()
 
-def list_transactions_for_user(db_conn, user_id: int, page: int = 1, page_size: int = 10):
+def list_transactions_for_user(db_conn, user_id: int, after=None, limit: int = 10):
+    """
+    One keyset page of a user's transactions. 'after' is the (created_at, id)
+    ordering tuple of the last row of the previous page; limit+1 rows are
+    returned so the caller can tell whether a further page exists. Seeking on
+    (created_at, id) keeps deep pages O(limit), unlike LIMIT/OFFSET which
+    scans and discards offset rows per page.
+    """
     cursor = db_conn.cursor(dictionary=True)
-    # Count total
-    # Using schema column names: initiating_user_id, receiving_user_id
-    count_query = "SELECT COUNT(id) as total_count FROM transactions WHERE initiating_user_id = %s OR receiving_user_id = %s"
-    cursor.execute(count_query, (user_id, user_id))
-    total_count_result = cursor.fetchone()
-    total_count = total_count_result['total_count'] if total_count_result else 0
+    try:
+        # The OR over two indexed columns defeats both single-column indexes
+        # and degrades to a scan + filesort, so the page ids come from a UNION
+        # of two range scans on idx_tx_init_created / idx_tx_recv_created,
+        # each seeking past the cursor and pre-sorted. UNION rather than
+        # UNION ALL so a self-transaction doesn't appear twice. The joined
+        # projection matches get_transaction_by_id so from_query_result
+        # consumes the rows unchanged.
+        seek = " AND (created_at, id) < (%s, %s)" if after is not None else ""
+        fetch = limit + 1
+        side_params = [user_id]
+        if after is not None:
+            side_params.extend(after)
+        side_params.append(fetch)
+        query = f"""
+            SELECT
+                t.*,
+                t.id as internal_transaction_id,
+                CASE WHEN u_init.id IS NULL THEN NULL ELSE JSON_OBJECT(
+                    'user_id', u_init.id, 'username', u_init.username, 'email', u_init.email) END AS init_user,
+                CASE WHEN u_recv.id IS NULL THEN NULL ELSE JSON_OBJECT(
+                    'user_id', u_recv.id, 'username', u_recv.username, 'email', u_recv.email) END AS recv_user
+            FROM (
+                (SELECT id, created_at FROM transactions
+                 WHERE initiating_user_id = %s{seek} ORDER BY created_at DESC, id DESC LIMIT %s)
+                UNION
+                (SELECT id, created_at FROM transactions
+                 WHERE receiving_user_id = %s{seek} ORDER BY created_at DESC, id DESC LIMIT %s)
+                ORDER BY created_at DESC, id DESC LIMIT %s
+            ) page_ids
+            JOIN transactions t ON t.id = page_ids.id
+            LEFT JOIN users u_init ON t.initiating_user_id = u_init.id
+            LEFT JOIN users u_recv ON t.receiving_user_id = u_recv.id
+            ORDER BY t.created_at DESC, t.id DESC
+        """
+        cursor.execute(query, tuple(side_params + side_params + [fetch]))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
 
-    offset = (page - 1) * page_size
-    query_ids = """
-        SELECT id FROM transactions 
-        WHERE initiating_user_id = %s OR receiving_user_id = %s
-        ORDER BY created_at DESC LIMIT %s OFFSET %s
+def update_transactions_status_bulk(db_conn, updates):
     """
-    cursor.execute(query_ids, (user_id, user_id, page_size, offset))
-    transaction_ids_data = cursor.fetchall()
-    # Close this cursor as get_transaction_by_id will open its own
-    cursor.close() 
-
-    detailed_transactions = []
-    if transaction_ids_data:
-        for row in transaction_ids_data:
-            # Re-use db_conn, get_transaction_by_id will manage its own cursor
-            tx_detail = get_transaction_by_id(db_conn, row['id']) 
-            if tx_detail:
-                detailed_transactions.append(tx_detail)
-    
-    return detailed_transactions, total_count
+    Bulk form of update_transaction_status for webhook bursts and
+    reconciliation jobs: ``updates`` is a list of (new_status,
+    internal_transaction_id) tuples, applied via one executemany under a
+    single commit - N round-trip/fsync pairs collapse to one. Returns the
+    number of rows changed.
+    """
+    if not updates:
+        return 0
+    cursor = db_conn.cursor()
+    try:
+        cursor.executemany(SQL_UPDATE_TX_STATUS, updates)
+        db_conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        db_conn.rollback()
+        raise e
+    finally:
+        cursor.close()
 
-def update_paypal_payment_id(db_conn, internal_transaction_id: int, paypal_payment_id_from_paypal: str):
+def update_transactions_on_paypal_success_bulk(db_conn, updates):
+    """
+    Bulk form of update_transaction_on_paypal_success: ``updates`` is a list
+    of (paypal_sale_id, new_status, internal_transaction_id) tuples. Same
+    one-commit batching as update_transactions_status_bulk.
+    """
+    if not updates:
+        return 0
     cursor = db_conn.cursor()
     try:
-        query = "UPDATE transactions SET paypal_payment_id = %s, updated_at = NOW() WHERE id = %s"
-        cursor.execute(query, (paypal_payment_id_from_paypal, internal_transaction_id))
+        cursor.executemany(SQL_UPDATE_TX_ON_SUCCESS, updates)
         db_conn.commit()
-        return cursor.rowcount > 0
+        return cursor.rowcount
     except Exception as e:
         db_conn.rollback()
         raise e
     finally:
         cursor.close()
+
+def update_paypal_payment_id(db_conn, internal_transaction_id: int, paypal_payment_id_from_paypal: str):
+    try:
+        cursor = db_utils.prepared_cursor(db_conn, SQL_UPDATE_TX_PAYPAL_ID, dictionary=False)
+        cursor.execute(SQL_UPDATE_TX_PAYPAL_ID, (paypal_payment_id_from_paypal, internal_transaction_id))
+        db_conn.commit()
+        return cursor.rowcount > 0
+    except Exception as e:
+        db_conn.rollback()
+        raise e
@@ -1,61 +1,340 @@
 # new_backend/user_queries.py
+import atexit
+import concurrent.futures
+import contextlib
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+
 from .auth_utils import get_password_hash
-import datetime # Not strictly needed for this file based on the provided snippet, but good to keep if future date manipulations are added.
+from . import db_utils
+from . import query_cache
+
+log = logging.getLogger(__name__)
+
+# In-process TTL cache for the three user lookups - they run on every
+# authenticated request (token validation, permission checks) and the rows
+# change rarely. Plain dict + lock like profile_lookup, instead of a cachetools
+# dependency. Misses are not cached: signup probes for nonexistent
+# emails/usernames must see the row the moment it exists.
+# by_email/by_username rows share a shape (they carry the password hash) and
+# cross-populate each other; by_id rows carry the joined profile ids instead,
+# so that cache stays separate.
+USER_CACHE_TTL_SECONDS = 300
+USER_CACHE_MAX_ENTRIES = 10000
+
+_user_by_id = {}       # user_id -> (expires_at, row)
+_user_by_email = {}    # email -> (expires_at, row)
+_user_by_username = {} # username -> (expires_at, row)
+_user_cache_lock = threading.Lock()
+
+def _cache_get(cache, key):
+    with _user_cache_lock:
+        entry = cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+    return None
+
+def _cache_put(cache, key, row):
+    with _user_cache_lock:
+        if len(cache) >= USER_CACHE_MAX_ENTRIES:
+            cache.clear() # crude eviction, but bounded; hot entries repopulate on demand
+        cache[key] = (time.monotonic() + USER_CACHE_TTL_SECONDS, row)
+
+def invalidate_user(user_id=None, username=None, email=None):
+    """
+    Drop cached rows for a user. Call with whichever identifiers are known
+    after a write that the cached columns reflect (user_type, names,
+    is_active, profile rows for the by-id shape). last_login is not among the
+    cached columns, so update_last_login does not need to invalidate.
+    """
+    with _user_cache_lock:
+        if user_id is not None:
+            _user_by_id.pop(user_id, None)
+        if username is not None:
+            _user_by_username.pop(username, None)
+        if email is not None:
+            _user_by_email.pop(email, None)
+
+@contextlib.contextmanager
+def _session(db_conn):
+    """
+    Yield the caller's connection as-is, or check one out of the shared
+    db_utils pool for the duration of the call when db_conn is None. This
+    keeps the historical (db_conn, ...) signatures working for the FastAPI
+    handlers (which manage their own checkout) while letting scripts and
+    background jobs call these functions without wiring a connection through.
+    One pool for the whole app - a second users-only pool would just split
+    the same MySQL connection budget in two.
+    """
+    if db_conn is not None:
+        yield db_conn
+    else:
+        with db_utils.db_session() as conn:
+            yield conn
+
+# bcrypt is on the order of 100ms of CPU per hash at the default cost; this
+# shared, cores-sized pool bounds how many hashes run at once, so a signup
+# spike queues behind the pool instead of occupying every request thread with
+# bcrypt simultaneously. Threads rather than a ProcessPoolExecutor: bcrypt's C
+# core releases the GIL, so threads already hash in parallel without the
+# fork/pickle hazards of child processes inside a web worker.
+_bcrypt_pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+
+def _hash_password(password):
+    # Request-scoped memo: a retry loop inside one request (e.g. after a
+    # duplicate-email race) can re-hash the identical password, at ~100ms per
+    # bcrypt. Keyed by a sha256 digest so the plaintext never sits in the
+    # cache; the cache itself dies with the request, so the hash is never
+    # shared across requests or stored globally.
+    digest = hashlib.sha256(password.encode()).hexdigest()
+    cached = query_cache.get(_hash_password, (digest,))
+    if cached is not None:
+        return cached
+    hashed = _bcrypt_pool.submit(get_password_hash, password).result()
+    query_cache.seed(_hash_password, (digest,), hashed)
+    return hashed
+
+# Column name for password is 'password' as per schema.sql
+# 'user_type' is the column for role as per schema.sql
+# Hoisted and run through a prepared cursor: the binary protocol returns the
+# auto-increment id in the execute's OK packet, so lastrowid never needs a
+# follow-up SELECT LAST_INSERT_ID(), and the server keeps the parsed plan per
+# pooled connection.
+SQL_CREATE_USER = (
+    "INSERT INTO users (username, email, password, user_type, first_name, last_name, "
+    "date_joined, created_at, updated_at, is_active) "
+    "VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW(), TRUE)"
+)
 
 def create_user(db_conn, username, email, password, role, first_name=None, last_name=None):
-    hashed_password = get_password_hash(password)
-    cursor = db_conn.cursor()
-    try:
-        # Column name for password is 'password' as per schema.sql
-        # 'user_type' is the column for role as per schema.sql
-        query = """
-        INSERT INTO users (username, email, password, user_type, first_name, last_name, date_joined, created_at, updated_at, is_active)
-        VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW(), TRUE)
-        """
-        cursor.execute(query, (username, email, hashed_password, role, first_name, last_name))
-        db_conn.commit()
-        return cursor.lastrowid # Returns the ID of the new user
-    except Exception as e:
-        db_conn.rollback()
-        raise e # Or handle more gracefully
-    finally:
-        cursor.close()
+    hashed_password = _hash_password(password)
+    with _session(db_conn) as conn:
+        try:
+            cursor = db_utils.prepared_cursor(conn, SQL_CREATE_USER, dictionary=False)
+            cursor.execute(SQL_CREATE_USER, (username, email, hashed_password, role, first_name, last_name))
+            new_user_id = cursor.lastrowid # from the OK packet, before anything else touches the connection
+            conn.commit()
+            # Misses are never cached, but a cross-filled row under either key
+            # could in principle predate this insert; dropping both is cheap.
+            invalidate_user(username=username, email=email)
+            return new_user_id # Returns the ID of the new user
+        except Exception as e:
+            conn.rollback()
+            raise e # Or handle more gracefully
+
+# Rows per multi-VALUES statement: 1000 rows of user columns stays well under
+# the default 64MB max_allowed_packet while still collapsing a seed/import of
+# N users into N/1000 round trips.
+_CREATE_USERS_CHUNK = 1000
+
+def create_users(db_conn, rows):
+    """
+    Bulk variant of create_user for seeding and imports. ``rows`` is an
+    iterable of dicts with the create_user fields (username, email, password,
+    role, optional first_name/last_name). Passwords are hashed in a thread
+    pool first - bcrypt's C core releases the GIL, so hashing scales with
+    cores - then the users are inserted via multi-row INSERT statements,
+    chunked to respect max_allowed_packet, under one commit.
+    Returns the number of users inserted.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    hashes = list(_bcrypt_pool.map(get_password_hash, (row['password'] for row in rows)))
+
+    with _session(db_conn) as conn:
+        cursor = conn.cursor()
+        try:
+            inserted = 0
+            for start in range(0, len(rows), _CREATE_USERS_CHUNK):
+                chunk = rows[start:start + _CREATE_USERS_CHUNK]
+                query = (
+                    "INSERT INTO users (username, email, password, user_type, first_name, last_name, "
+                    "date_joined, created_at, updated_at, is_active) VALUES "
+                    + ",".join(["(%s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW(), TRUE)"] * len(chunk))
+                )
+                params = []
+                for row, hashed in zip(chunk, hashes[start:start + _CREATE_USERS_CHUNK]):
+                    params.extend((row['username'], row['email'], hashed, row['role'],
+                                   row.get('first_name'), row.get('last_name')))
+                cursor.execute(query, tuple(params))
+                inserted += cursor.rowcount
+            conn.commit() # one fsync for the whole import
+            return inserted
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            cursor.close()
+
+# Hoisted lookup statements, executed through db_utils.prepared_cursor: one
+# dictionary cursor per (connection, statement) lives for the connection's
+# lifetime, so cache misses stop paying a cursor allocation + close per call
+# on top of re-sending the SQL text.
+# Select specific columns and alias user_type to role for consistency;
+# 'password' is fetched for password verification. The column list matches
+# the idx_users_*_cover indexes in schema.sql exactly (no first_name /
+# last_name - they would push the key past InnoDB's 3072-byte limit, and no
+# caller of these lookups reads them) so the statements stay index-only.
+SQL_USER_BY_EMAIL = "SELECT id, username, email, password, user_type as role, is_active FROM users WHERE email = %s"
+SQL_USER_BY_USERNAME = "SELECT id, username, email, password, user_type as role, is_active FROM users WHERE username = %s"
+# Column names match schema.sql, e.g. 'user_type' for role. LEFT JOIN the
+# profile tables so callers (e.g. the profile-id dependencies in main.py) get
+# caregiver_profile_id/family_profile_id without a second query. At most one
+# of the two ids is non-NULL since user_id is UNIQUE on both tables.
+SQL_USER_BY_ID = """
+    SELECT u.id, u.username, u.email, u.user_type as role, u.first_name, u.last_name, u.is_active,
+           cp.id AS caregiver_profile_id, fp.id AS family_profile_id
+    FROM users u
+    LEFT JOIN caregiver_profiles cp ON cp.user_id = u.id
+    LEFT JOIN family_profiles fp ON fp.user_id = u.id
+    WHERE u.id = %s
+"""
 
 def get_user_by_email(db_conn, email):
-    cursor = db_conn.cursor(dictionary=True) # dictionary=True to get results as dicts
-    try:
-        # Select specific columns and alias user_type to role for consistency
-        # Ensure 'password' column is fetched for password verification
-        cursor.execute("SELECT id, username, email, password, user_type as role, first_name, last_name, is_active FROM users WHERE email = %s", (email,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
+    row = _cache_get(_user_by_email, email)
+    if row is not None:
+        return row
+    with _session(db_conn) as conn:
+        cursor = db_utils.prepared_cursor(conn, SQL_USER_BY_EMAIL)
+        cursor.execute(SQL_USER_BY_EMAIL, (email,))
+        row = cursor.fetchone()
+    if row:
+        _cache_put(_user_by_email, email, row)
+        _cache_put(_user_by_username, row['username'], row) # same shape, free cross-fill
+    return row
 
 def get_user_by_username(db_conn, username):
-    cursor = db_conn.cursor(dictionary=True)
-    try:
-        # Select specific columns and alias user_type to role
-        cursor.execute("SELECT id, username, email, password, user_type as role, first_name, last_name, is_active FROM users WHERE username = %s", (username,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
-        
+    row = _cache_get(_user_by_username, username)
+    if row is not None:
+        return row
+    with _session(db_conn) as conn:
+        cursor = db_utils.prepared_cursor(conn, SQL_USER_BY_USERNAME)
+        cursor.execute(SQL_USER_BY_USERNAME, (username,))
+        row = cursor.fetchone()
+    if row:
+        _cache_put(_user_by_username, username, row)
+        _cache_put(_user_by_email, row['email'], row) # same shape, free cross-fill
+    return row
+
 def get_user_by_id(db_conn, user_id):
-    cursor = db_conn.cursor(dictionary=True)
+    row = _cache_get(_user_by_id, user_id)
+    if row is not None:
+        return row
+    with _session(db_conn) as conn:
+        cursor = db_utils.prepared_cursor(conn, SQL_USER_BY_ID)
+        cursor.execute(SQL_USER_BY_ID, (user_id,))
+        row = cursor.fetchone()
+    if row:
+        _cache_put(_user_by_id, user_id, row)
+    return row
+
+def get_users_by_ids(db_conn, user_ids):
+    """
+    Bulk form of get_user_by_id: one IN-list SELECT for all uncached ids
+    instead of a round trip per id. Returns {user_id: row} with the same row
+    shape as get_user_by_id; ids with no user row are simply absent. Serves
+    from and fills the same TTL cache.
+    """
+    users = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids): # de-dup, keep order
+        row = _cache_get(_user_by_id, user_id)
+        if row is not None:
+            users[user_id] = row
+        else:
+            missing.append(user_id)
+    if not missing:
+        return users
+    # Not a hoisted constant: the placeholder count varies with the batch, so
+    # this statement would thrash the per-connection prepared cache anyway.
+    query = SQL_USER_BY_ID.replace("u.id = %s",
+                                   "u.id IN (" + ", ".join(["%s"] * len(missing)) + ")")
+    with _session(db_conn) as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, tuple(missing))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    for row in rows:
+        users[row['id']] = row
+        _cache_put(_user_by_id, row['id'], row)
+    return users
+
+# last_login is advisory bookkeeping - slightly stale is fine - so it no
+# longer costs an UPDATE + commit (a binlog/redo fsync) in every login's
+# critical path. update_last_login just records the timestamp in a dict; a
+# daemon thread drains it every couple of seconds into one upsert, so 50
+# logins by the same user in a window become one write. The upsert targets
+# the dedicated user_login_events table (user_id, last_login) rather than the
+# wide users rows, keeping the users clustered index read-mostly; the
+# two-column table also makes multi-row INSERT ... ON DUPLICATE KEY UPDATE
+# safe, since there are no other NOT NULL columns for a fresh row to satisfy.
+_LAST_LOGIN_FLUSH_SECONDS = 2.0
+
+_pending_last_login = {} # user_id -> datetime of most recent login
+_last_login_lock = threading.Lock()
+_last_login_flusher = None
+
+def _flush_last_logins():
+    with _last_login_lock:
+        if not _pending_last_login:
+            return
+        pending = dict(_pending_last_login)
+        _pending_last_login.clear()
+    query = (
+        "INSERT INTO user_login_events (user_id, last_login) VALUES "
+        + ", ".join(["(%s, %s)"] * len(pending))
+        + " ON DUPLICATE KEY UPDATE last_login = VALUES(last_login)"
+    )
+    params = []
+    for user_id, logged_in_at in pending.items():
+        params.extend((user_id, logged_in_at))
     try:
-        # Ensure column names match schema.sql, e.g., 'user_type' for role
-        cursor.execute("SELECT id, username, email, user_type as role, first_name, last_name, is_active FROM users WHERE id = %s", (user_id,))
-        return cursor.fetchone()
-    finally:
-        cursor.close()
+        with db_utils.db_session() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, tuple(params))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    except Exception:
+        log.exception("last_login flush failed; re-queueing %d entries", len(pending))
+        with _last_login_lock:
+            for user_id, logged_in_at in pending.items():
+                # keep the newer timestamp if the user logged in again meanwhile
+                _pending_last_login.setdefault(user_id, logged_in_at)
+
+def _last_login_flush_loop():
+    while True:
+        time.sleep(_LAST_LOGIN_FLUSH_SECONDS)
+        try:
+            _flush_last_logins()
+        except Exception:
+            log.exception("last_login flush loop iteration failed")
+
+def _ensure_last_login_flusher():
+    global _last_login_flusher
+    if _last_login_flusher is None:
+        with _last_login_lock:
+            if _last_login_flusher is None:
+                thread = threading.Thread(target=_last_login_flush_loop,
+                                          name="last-login-flusher", daemon=True)
+                thread.start()
+                _last_login_flusher = thread
+                atexit.register(_flush_last_logins) # best-effort drain on shutdown
 
 def update_last_login(db_conn, user_id):
-    cursor = db_conn.cursor()
-    try:
-        cursor.execute("UPDATE users SET last_login = NOW() WHERE id = %s", (user_id,))
-        db_conn.commit()
-    except Exception as e:
-        db_conn.rollback()
-        raise e
-    finally:
-        cursor.close()
+    # db_conn is accepted for signature compatibility but unused: the write
+    # happens later on a pooled connection owned by the flusher thread.
+    _ensure_last_login_flusher()
+    with _last_login_lock:
+        _pending_last_login[user_id] = datetime.datetime.utcnow()